@@ -0,0 +1,15 @@
+"""Rebuilds the stale shared apps in the Azure Blob Storage
+
+Run `python scripts/rebuild_apps.py --help` for the options.
+"""
+from panel_sharing import rebuild
+from panel_sharing.models import AzureBlobStorage
+
+
+def run():
+    """Rebuilds the stale apps"""
+    rebuild.run(AzureBlobStorage, description=__doc__)
+
+
+if __name__ == "__main__":
+    run()
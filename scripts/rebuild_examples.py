@@ -1,24 +1,24 @@
-import shutil
+"""Rebuilds the stale examples
+
+Run `python scripts/rebuild_examples.py --help` for the options.
+"""
+from functools import partial
 from pathlib import Path
-from panel_sharing.models import Project
-from panel_sharing.components.gallery import _read_projects
-from panel_sharing.utils import set_directory
-import string
+
+from panel_sharing import rebuild
+from panel_sharing.models import FolderStorage
 
 EXAMPLES_PATH = Path(__file__).parent.parent / "src/panel_sharing/examples"
 
+
 def run():
-    path = EXAMPLES_PATH
-    for folder in path.iterdir():
-        if folder.name == "welcome":
-            if folder.is_dir():
-                with set_directory(folder):
-                    project = Project.read()
-                    project.rebuild(base_target="_blank")
-                project.name = string.capwords(folder.name.replace("-", " "))
-                shutil.copytree(src=project._tmppath, dst=folder, dirs_exist_ok=True)
-                print(f"rebuilt {folder}")
+    """Rebuilds the stale examples"""
+    rebuild.run(
+        partial(FolderStorage, path=EXAMPLES_PATH, base_target="_blank"),
+        description=__doc__,
+        name="examples",
+    )
+
 
-if __name__=="__main__":
+if __name__ == "__main__":
     run()
-    
\ No newline at end of file
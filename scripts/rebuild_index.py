@@ -0,0 +1,16 @@
+"""Rebuilds the index of the shared apps in the Azure Blob Storage from a full listing
+
+The index is a single blob with the keys of the apps. Rebuild it if it is missing apps or lists
+deleted apps.
+"""
+from panel_sharing.models import AzureBlobStorage
+
+
+def run():
+    """Rebuilds the index"""
+    keys = AzureBlobStorage().rebuild_index()
+    print(f"Rebuilt the index with {len(keys)} apps")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,40 @@
+"""Serves the Sharing App and the gallery
+
+The examples are published before serving. The development builds are served from memory by the
+routes of `get_routes`. The published examples and shared apps are served from their www folders.
+With a `local://` AZURE_BLOB_CONN_STR the shared apps are served from the local blob service.
+"""
+import mimetypes
+import sys
+
+import panel as pn
+
+from panel_sharing import config, sharing
+from panel_sharing.components import create_project_gallery
+from panel_sharing.models import EXAMPLES, Site
+from panel_sharing.publishing import publish_example
+from panel_sharing.shared.azure import local
+from panel_sharing.shared.dev_builds import get_routes
+
+
+def run(port: int = 5006):
+    """Serves the apps on the port"""
+    mimetypes.add_type("application/javascript", ".js")
+    # The sites of the sessions show the published examples served below
+    config.EXAMPLES_URL = "apps-examples"
+    storage = Site().examples_storage
+    for example in sharing.get_examples(str(EXAMPLES.absolute())):
+        # The projects are read one at a time and deleted when published
+        with example.read() as project:
+            publish_example(storage, project)
+    pn.serve(
+        {"sharing": sharing.create, "sharing_gallery": create_project_gallery},
+        port=port,
+        show=False,
+        static_dirs={"apps": "apps/prod/www", config.EXAMPLES_URL: "apps/examples/www"},
+        extra_patterns=get_routes("apps/dev/www") + local.get_routes(config.AZURE_BLOB_CONN_STR),
+    )
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:2]))
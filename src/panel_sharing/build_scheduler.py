@@ -0,0 +1,147 @@
+"""A scheduler that coordinates the conversions of all sessions
+
+- Identical builds in flight are merged into one by their key (the content digest).
+- Interactive development builds are run before shares and bulk rebuilds.
+- The number of concurrent conversions is capped.
+- If the queue is full new work is rejected with a BuildSchedulerBusy error.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+import param
+
+from panel_sharing import config
+
+logger = logging.getLogger("panel_sharing.build_scheduler")
+
+INTERACTIVE = "interactive"
+SHARE = "share"
+BULK = "bulk"
+PRIORITIES = {INTERACTIVE: 0, SHARE: 1, BULK: 2}
+
+
+class BuildSchedulerBusy(Exception):
+    """Raised if the build queue is full"""
+
+
+class BuildScheduler(param.Parameterized):
+    """A scheduler that coordinates the conversions of all sessions"""
+
+    max_concurrent = param.Integer(config.BUILD_MAX_CONCURRENT, bounds=(1, None))
+    max_queued = param.Integer(
+        config.BUILD_MAX_QUEUED,
+        bounds=(0, None),
+        doc="The number of builds that may wait for a free slot. 0 only accepts builds that can "
+        "start immediately",
+    )
+
+    def __init__(self, **params):
+        super().__init__(**params)
+
+        self._queue: List[Tuple[int, int, str, Callable[[], Any], Future]] = []
+        self._in_flight: Dict[str, Future] = {}
+        self._priorities: Dict[str, int] = {}
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    def _queued(self) -> int:
+        return sum(
+            1 for future in self._in_flight.values() if not (future.running() or future.done())
+        )
+
+    def _free_slots(self) -> int:
+        running = sum(1 for future in self._in_flight.values() if future.running())
+        return max(0, self.max_concurrent - running)
+
+    @property
+    def queued(self) -> int:
+        """Returns the number of builds waiting to run"""
+        with self._condition:
+            return self._queued()
+
+    def submit(self, key: str, function: Callable[[], Any], priority: str = INTERACTIVE) -> Future:
+        """Schedules function to run unless a build with the same key is already in flight
+
+        Args:
+            key: Identifies the build. For example the content digest of the build inputs
+            function: The build to run
+            priority: One of 'interactive', 'share' or 'bulk'
+
+        Raises:
+            BuildSchedulerBusy: If the queue is full
+
+        Returns:
+            A Future of the result of the build
+        """
+        rank = PRIORITIES[priority]
+        with self._condition:
+            future = self._in_flight.get(key, None)
+            if future:
+                if rank < self._priorities[key] and not (future.running() or future.done()):
+                    # Move the queued build to the higher priority lane
+                    self._priorities[key] = rank
+                    heapq.heappush(self._queue, (rank, next(self._counter), key, function, future))
+                    self._condition.notify()
+                return future
+
+            # The builds that cannot start in a free slot must wait in the queue
+            if self._queued() >= self.max_queued + self._free_slots():
+                raise BuildSchedulerBusy("The build server is busy. Please try again in a moment.")
+
+            future = Future()
+            self._in_flight[key] = future
+            self._priorities[key] = rank
+            heapq.heappush(self._queue, (rank, next(self._counter), key, function, future))
+            self._start_threads()
+            self._condition.notify()
+        return future
+
+    def run(self, key: str, function: Callable[[], Any], priority: str = INTERACTIVE) -> Any:
+        """Runs function via the scheduler and returns its result"""
+        return self.submit(key=key, function=function, priority=priority).result()
+
+    def _start_threads(self):
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        for _ in range(self.max_concurrent - len(self._threads)):
+            thread = threading.Thread(target=self._run_builds, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next(self) -> Tuple[str, Callable[[], Any], Future]:
+        with self._condition:
+            while True:
+                while not self._queue:
+                    self._condition.wait()
+                _, _, key, function, future = heapq.heappop(self._queue)
+                # A build moved to a higher priority lane is queued twice
+                if future.running() or future.done():
+                    continue
+                if future.set_running_or_notify_cancel():
+                    return key, function, future
+                self._in_flight.pop(key, None)
+                self._priorities.pop(key, None)
+
+    def _run_builds(self):
+        while True:
+            key, function, future = self._next()
+            try:
+                result = function()
+            except Exception as ex:  # pylint: disable=broad-except
+                logger.exception("Build %s failed", key)
+                future.set_exception(ex)
+            else:
+                future.set_result(result)
+            finally:
+                with self._condition:
+                    self._in_flight.pop(key, None)
+                    self._priorities.pop(key, None)
+
+
+BUILD_SCHEDULER = BuildScheduler()
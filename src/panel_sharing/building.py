@@ -0,0 +1,83 @@
+"""Converts the source files of projects to builds cached by the digest of the conversion inputs
+
+A build is a pure function of the conversion inputs: the code, the requirements, the build kwargs
+and the versions of the converter. Their digest is the key of the build in the BUILD_CACHE. Thus
+identical projects of all sessions and processes are only converted once.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+from bokeh import __version__ as bokeh_version
+from panel import __version__
+
+from panel_sharing import VERSION, config
+from panel_sharing.convert import _create_error_build
+from panel_sharing.converter_pool import CONVERTER_POOL, ConverterError, ConverterLimitExceeded
+from panel_sharing.shared.build_cache import BuildCache
+from panel_sharing.shared.compression import optimize_tree
+from panel_sharing.shared.transfer import link_tree
+from panel_sharing.utils import Timer
+
+BUILD_CACHE = BuildCache(Path(config.BUILD_CACHE_PATH))
+
+
+def get_build_digest(code: str, requirements: str, kwargs: Dict) -> str:
+    """Returns a digest of the conversion inputs that is stable across processes and restarts
+
+    The base target is not included. It is applied to the canonical build afterwards.
+    """
+    value = {
+        "code": code,
+        "requirements": requirements,
+        "build_kwargs": kwargs,
+        "panel": __version__,
+        "bokeh": bokeh_version,
+        "panel_sharing": VERSION,
+        "minify": config.BUILD_MINIFY,
+        "precompress": config.BUILD_PRECOMPRESS,
+    }
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf8")).hexdigest()
+
+
+def convert(source: Path, kwargs: Dict, digest: str) -> tempfile.TemporaryDirectory:
+    """Converts the source files in a new folder and stores the canonical build in the BUILD_CACHE
+
+    The build files are minified and precompressed if configured. A build that exceeds the
+    converter limits or whose converter stops unexpectedly is replaced by an error build and not
+    cached.
+
+    Returns:
+        The TemporaryDirectory containing the build folder
+    """
+    tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+    path = Path(tmpdir.name)
+    link_tree(source, path / "source")
+    build = path / "build"
+    with Timer("convert project"):
+        try:
+            error = CONVERTER_POOL.convert(path=path, kwargs=kwargs)
+        except ConverterError as ex:
+            if isinstance(ex, ConverterLimitExceeded):
+                error = f"Build exceeded limits. {ex}"
+            else:
+                error = f"Build failed. {ex}"
+            shutil.rmtree(build, ignore_errors=True)
+            _create_error_build(
+                app_html_path=build / "app.html", app_js_path=build / "app.js", error=error
+            )
+    if config.BUILD_MINIFY or config.BUILD_PRECOMPRESS:
+        with Timer("optimize build"):
+            optimize_tree(
+                build,
+                minify_files=config.BUILD_MINIFY,
+                precompress_files=config.BUILD_PRECOMPRESS,
+            )
+    if not error:
+        BUILD_CACHE.put(digest, build)
+    return tmpdir
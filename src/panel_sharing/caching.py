@@ -0,0 +1,119 @@
+"""A read-through cache of the projects of a Storage on the local disk
+
+Every time a shared link is opened the project is read from the production storage. The
+CachingStorage keeps the most recently used projects on the local disk instead. A cached project
+is revalidated by comparing its etag to the current etag in the wrapped storage. Thus only the etag
+is requested if the project did not change.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict
+
+import param
+
+from panel_sharing import config
+from panel_sharing.models import Project, Storage
+from panel_sharing.shared.transfer import remove_least_recently_used, replace_tree, write_text
+
+
+class CachingStorage(Storage):
+    """A Storage that caches the projects of another Storage on the local disk
+
+    If the wrapped storage implements `get_etag(key)` the cached projects are revalidated on every
+    read. Otherwise they are used until they are replaced via the CachingStorage or evicted.
+
+    The least recently used projects are evicted when there are more than `max_entries`. The
+    cache is shared by the processes using the same path.
+
+    Other attributes, for example `get_url`, are forwarded to the wrapped storage.
+    """
+
+    storage = param.ClassSelector(class_=Storage, constant=True, doc="The storage to cache")
+    max_entries = param.Integer(
+        default=config.STORAGE_CACHE_MAX_ENTRIES,
+        bounds=(1, None),
+        doc="The maximum number of projects to cache",
+    )
+
+    def __init__(self, path: str | Path = config.STORAGE_CACHE_PATH, **params):
+        super().__init__(**params)
+
+        self._path = Path(path).absolute()
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name: str):
+        # Only called if the attribute is not found on the CachingStorage itself
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.storage, name)
+
+    def _get_entry_path(self, key: str) -> Path:
+        return self._path / hashlib.sha256(key.encode("utf8")).hexdigest()
+
+    def _get_etag(self, key: str) -> str:
+        get_etag = getattr(self.storage, "get_etag", None)
+        return get_etag(key) if get_etag else ""
+
+    def __getitem__(self, key: str) -> Project:
+        entry = self._get_entry_path(key)
+        etag = self._get_etag(key)
+        try:
+            if (entry / "etag").read_text(encoding="utf8") == etag:
+                project = Project.read(entry / "project")
+                os.utime(entry)
+                with self._lock:
+                    self.hits += 1
+                return project
+        except FileNotFoundError:
+            # Not cached or evicted while reading
+            pass
+        with self._lock:
+            self.misses += 1
+        # The etag is read before the project. If the project changes in between it is
+        # downloaded again on the next read
+        project = self.storage[key]
+        self._put(entry, project, etag)
+        return project
+
+    def _put(self, entry: Path, project: Project, etag: str):
+        tmp = self._path / f".tmp-{uuid.uuid4()}"
+        try:
+            project.save(tmp / "project")
+            write_text(tmp / "etag", etag)
+            replace_tree(tmp, entry)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        remove_least_recently_used(self._path, self.max_entries)
+
+    def _invalidate(self, key: str):
+        shutil.rmtree(self._get_entry_path(key), ignore_errors=True)
+
+    def __setitem__(self, key: str, value: Project):
+        self.storage[key] = value
+        self._invalidate(key)
+
+    def __delitem__(self, key: str):
+        del self.storage[key]
+        self._invalidate(key)
+
+    def keys(self):
+        """Returns the list of keys of the storage"""
+        return self.storage.keys()
+
+    def copy(self, key: str, project: Project):
+        self.storage.copy(key=key, project=project)
+        self._invalidate(key)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of cache hits and misses and the number of cached projects"""
+        entries = sum(1 for path in self._path.iterdir() if not path.name.startswith("."))
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
@@ -3,6 +3,7 @@ import panel as pn
 import param
 
 from panel_sharing.components.js_actions import JSActions
+from panel_sharing.models import PENDING, RUNNING
 from panel_sharing.utils import del_query_params
 
 
@@ -27,8 +28,8 @@ class ProjectBuilder(pn.viewable.Viewer):
         return self._panel
 
     @pn.depends("convert", watch=True)
-    def _convert(self):
-        self._state.build()
+    async def _convert(self):
+        await self._state.abuild()
 
         if pn.state.notifications:
             pn.state.notifications.success("Build succeeded")
@@ -36,6 +37,12 @@ class ProjectBuilder(pn.viewable.Viewer):
         del_query_params()
         pn.state.location.update_query(project=self._state.project.to_base64())
 
+    @pn.depends("_state.build_status", watch=True)
+    def _notify_build_status(self):
+        status = self._state.build_status
+        if pn.state.notifications and status in [PENDING, RUNNING]:
+            pn.state.notifications.info(f"Build {status}", duration=2000)
+
     @pn.depends("open_developer_link", watch=True)
     def _open_developer_link(self):
         self.jsactions.open(url=self._state.development_url)
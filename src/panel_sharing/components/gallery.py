@@ -1,5 +1,9 @@
 """The Gallery component enables users to select a project from a list of projects"""
+from __future__ import annotations
+
+import hashlib
 import string
+import threading
 from pathlib import Path
 from typing import List
 
@@ -7,24 +11,58 @@ import panel as pn
 
 from panel_sharing.models import Gallery as GalleryModel
 from panel_sharing.models import Project
-from panel_sharing.utils import set_directory
-
 
-def _read_projects(path: Path):
-    examples = []
-    for folder in path.iterdir():
-        if folder.is_dir():
-            with set_directory(folder):
-                project = Project.read()
-            project.name = string.capwords(folder.name.replace("-", " "))
-            examples.append(project)
+# The source files identifying the content of an example
+DIGEST_FILES = ("app.py", "requirements.txt", "readme.md")
+
+
+class Example:
+    """The name, path and digest of an example project
+
+    The Project is only read on first use. Reading it loads the files of the example into memory.
+    Thus listing hundreds of examples stays fast and small.
+    """
+
+    def __init__(self, path: Path, name: str = ""):
+        self.path = Path(path)
+        self.name = name or string.capwords(self.path.name.replace("-", " "))
+        digest = hashlib.sha256()
+        for file in DIGEST_FILES:
+            source = self.path / "source" / file
+            if source.exists():
+                digest.update(file.encode("utf8") + b"\0" + source.read_bytes() + b"\0")
+        self.digest = digest.hexdigest()
+        self._project: Project | None = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"Example(name={self.name!r}, path={str(self.path)!r})"
+
+    def read(self) -> Project:
+        """Returns a new Project read from the path"""
+        project = Project.read(self.path)
+        project.name = self.name
+        return project
+
+    @property
+    def project(self) -> Project:
+        """The Project read on first use. It is shared by all users of the example"""
+        with self._lock:
+            if self._project is None:
+                self._project = self.read()
+            return self._project
+
+
+def read_examples(path: Path) -> List[Example]:
+    """Returns the examples in the folders of the path sorted by name"""
+    examples = [Example(folder) for folder in path.iterdir() if folder.is_dir()]
     return sorted(examples, key=lambda x: x.name)
 
 
 class Gallery(GalleryModel, pn.viewable.Viewer):
     """Enables users to select a project from a list of projects"""
 
-    def __init__(self, examples: List[Project], **params):
+    def __init__(self, examples: List[Example], **params):
         super().__init__()
 
         layout = pn.Column(
@@ -38,7 +76,7 @@ class Gallery(GalleryModel, pn.viewable.Viewer):
 
         self._examples_map = {example.name: example for example in examples}
 
-        self.value = self._examples_map.get("Welcome", examples[0])
+        self.value = self._examples_map.get("Welcome", examples[0]).project
 
         for example in examples:
             button = pn.widgets.Button(name=example.name, button_type="light")
@@ -49,7 +87,7 @@ class Gallery(GalleryModel, pn.viewable.Viewer):
         self._panel = layout
 
     def _click_handler(self, event):
-        self.value = self._examples_map[event.obj.name]
+        self.value = self._examples_map[event.obj.name].project
 
     def __panel__(self):
         return self._panel
@@ -57,12 +95,12 @@ class Gallery(GalleryModel, pn.viewable.Viewer):
     @classmethod
     def read(cls, path: Path) -> "Gallery":
         """Returns a Gallery of projects read from the specified path"""
-        examples = _read_projects(path)
+        examples = read_examples(path)
         return cls(examples=examples)
 
     def get(self, name) -> Project:
         """Returns the project with the specified name"""
-        return self._examples_map[name]
+        return self._examples_map[name].project
 
 
 if __name__.startswith("bokeh"):
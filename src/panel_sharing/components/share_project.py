@@ -81,8 +81,8 @@ class ShareProject(pn.viewable.Viewer):
         return self.app_state.project.to_zip_folder()
 
     @pn.depends("share", watch=True)
-    def _share(self):
-        self.shared_url = self.app_state.share()
+    async def _share(self):
+        self.shared_url = await self.app_state.ashare()
         if pn.state.notifications:
             pn.state.notifications.success("Release succeeded")
         if pn.state.location:
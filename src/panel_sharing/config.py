@@ -108,6 +108,50 @@ AZURE_CDN_ENDPOINT_NAME = "awesome-panel-sharing"
 AZURE_APP_CLIENT_ID = os.getenv("AZURE_APP_CLIENT_ID", "")
 AZURE_APP_CLIENT_SECRET = os.getenv("AZURE_APP_CLIENT_SECRET", "")
 AZURE_TENANT_ID = os.getenv("AZURE_TENANT_ID", "")
+# The number of seconds to collect paths to purge from the CDN in a single request
+AZURE_CDN_PURGE_WINDOW = float(os.getenv("PANEL_SHARING_AZURE_CDN_PURGE_WINDOW", "2"))
+# The number of files uploaded to and downloaded from the blob storage concurrently
+AZURE_CONCURRENCY = int(os.getenv("PANEL_SHARING_AZURE_CONCURRENCY", "8"))
+# The connection pool shared by all the blob storage clients of the process. Timeouts in seconds
+AZURE_MAX_CONNECTIONS = int(os.getenv("PANEL_SHARING_AZURE_MAX_CONNECTIONS", "32"))
+AZURE_CONNECTION_TIMEOUT = float(os.getenv("PANEL_SHARING_AZURE_CONNECTION_TIMEOUT", "20"))
+AZURE_READ_TIMEOUT = float(os.getenv("PANEL_SHARING_AZURE_READ_TIMEOUT", "60"))
+
+# The url the www folder of the published examples is served at. For example "apps-examples". If
+# empty the examples are copied to the development storage of each session instead
+EXAMPLES_URL = os.getenv("PANEL_SHARING_EXAMPLES_URL", "")
+BUILD_CACHE_PATH = os.getenv("PANEL_SHARING_BUILD_CACHE_PATH", ".cache/panel_sharing/builds")
+BUILD_CACHE_MAX_ENTRIES = int(os.getenv("PANEL_SHARING_BUILD_CACHE_MAX_ENTRIES", "1000"))
+# The shared projects read from the production storage are cached here
+STORAGE_CACHE_PATH = os.getenv("PANEL_SHARING_STORAGE_CACHE_PATH", ".cache/panel_sharing/projects")
+STORAGE_CACHE_MAX_ENTRIES = int(os.getenv("PANEL_SHARING_STORAGE_CACHE_MAX_ENTRIES", "500"))
+BUILD_MAX_CONCURRENT = int(
+    os.getenv("PANEL_SHARING_BUILD_MAX_CONCURRENT", str(os.cpu_count() or 1))
+)
+BUILD_MAX_QUEUED = int(os.getenv("PANEL_SHARING_BUILD_MAX_QUEUED", "100"))
+# Minify and precompress (.gz, .br) the build files. Minifying requires the performance extras
+BUILD_MINIFY = os.getenv("PANEL_SHARING_BUILD_MINIFY", "true").lower() == "true"
+BUILD_PRECOMPRESS = os.getenv("PANEL_SHARING_BUILD_PRECOMPRESS", "true").lower() == "true"
+BUILD_CACHE_CONTROL = os.getenv("PANEL_SHARING_BUILD_CACHE_CONTROL", "public, max-age=300")
+# The development builds are deleted when no longer used, after the TTL in seconds or when they
+# use more than the max size in MB
+DEV_BUILDS_TTL = float(os.getenv("PANEL_SHARING_DEV_BUILDS_TTL", str(6 * 60 * 60)))
+DEV_BUILDS_MAX_SIZE = float(os.getenv("PANEL_SHARING_DEV_BUILDS_MAX_SIZE", "2048"))
+DEV_BUILDS_GRACE = float(os.getenv("PANEL_SHARING_DEV_BUILDS_GRACE", "600"))
+DEV_BUILDS_GC_INTERVAL = float(os.getenv("PANEL_SHARING_DEV_BUILDS_GC_INTERVAL", "60"))
+# The development builds served by the dev_builds routes are kept in memory up to this size in MB
+DEV_BUILDS_MEMORY_SIZE = float(os.getenv("PANEL_SHARING_DEV_BUILDS_MEMORY_SIZE", "256"))
+CONVERTER_POOL_SIZE = BUILD_MAX_CONCURRENT
+# The peak memory in MB a converter may reach before it is recycled
+CONVERTER_MAX_MEMORY = int(os.getenv("PANEL_SHARING_CONVERTER_MAX_MEMORY", "1024"))
+CONVERTER_HEALTH_CHECK_PERIOD = float(
+    os.getenv("PANEL_SHARING_CONVERTER_HEALTH_CHECK_PERIOD", "60")
+)
+# The limits of a single build in seconds and MB. 0 disables a limit
+CONVERTER_TIMEOUT = float(os.getenv("PANEL_SHARING_CONVERTER_TIMEOUT", "120"))
+CONVERTER_MAX_CPU = int(os.getenv("PANEL_SHARING_CONVERTER_MAX_CPU", "60"))
+CONVERTER_MAX_ADDRESS_SPACE = int(os.getenv("PANEL_SHARING_CONVERTER_MAX_ADDRESS_SPACE", "4096"))
+CONVERTER_MAX_OUTPUT_SIZE = float(os.getenv("PANEL_SHARING_CONVERTER_MAX_OUTPUT_SIZE", "50"))
 
 AUTHENTICATED = False
 
@@ -0,0 +1,467 @@
+"""A pool of long lived converter processes
+
+Converting a project runs the users code. We need to be really careful when we convert. See
+https://github.com/holoviz/panel/issues/3939. Thus conversions never run in the server process.
+
+Starting a new process for each conversion costs a re-import of Bokeh and Panel. Instead the
+ConverterPool keeps a number of warm worker processes alive that have imported them. Each worker
+runs one conversion at a time in a fresh child forked from itself. Thus no state leaks between the
+conversions of different users. A worker is only recycled when its memory high-water mark is
+exceeded.
+
+Each conversion is limited in wall-clock time, CPU time, address space and output size. The limits
+apply to the child only. A child that exceeds a limit is killed and a ConverterLimitExceeded error
+is raised.
+"""
+from __future__ import annotations
+
+import errno
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import param
+
+from panel_sharing import config
+
+logger = logging.getLogger("panel_sharing.converter_pool")
+
+if os.name == "nt":
+    CTX_METHOD = "spawn"
+else:
+    CTX_METHOD = "forkserver"
+
+ctx_forkserver = multiprocessing.get_context(CTX_METHOD)
+ctx_forkserver.set_forkserver_preload(
+    [
+        # "base64",
+        "bokeh",
+        "holoviews",
+        "hvplot",
+        # "io",
+        # "matplotlib",
+        "numpy",
+        "pandas",
+        "panel",
+        "panel.io.convert",
+        "panel_sharing.convert",
+        "param",
+        # "PIL",
+        # "skimage",
+    ]
+)
+
+PING = "ping"
+PONG = "pong"
+# Seconds the worker may need on top of the timeout to kill the child and respond
+TIMEOUT_GRACE = 5.0
+
+
+class ConverterError(Exception):
+    """Raised if a converter process stops unexpectedly"""
+
+
+class ConverterLimitExceeded(ConverterError):
+    """Raised if a conversion exceeds the time, cpu, memory or output size limits"""
+
+
+def _get_max_rss() -> int:
+    """Returns the peak resident memory of the current process in MB"""
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:  # Windows
+        return 0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return max_rss // 1024 // 1024
+    return max_rss // 1024
+
+
+def _apply_limits(max_cpu: int, max_address_space: int, max_output_size: float):
+    """Lowers the soft resource limits of the current process. 0 disables a limit"""
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:  # Windows
+        return
+
+    def _set_limit(limit: int, value: int):
+        _, hard = resource.getrlimit(limit)
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        resource.setrlimit(limit, (value, hard))
+
+    if max_cpu:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        _set_limit(resource.RLIMIT_CPU, int(usage.ru_utime + usage.ru_stime) + max_cpu)
+    if max_address_space:
+        _set_limit(resource.RLIMIT_AS, max_address_space * 1024 * 1024)
+    if max_output_size:
+        _set_limit(resource.RLIMIT_FSIZE, int(max_output_size * 1024 * 1024))
+
+
+def _get_size(path: Path) -> float:
+    """Returns the size of the files in path in MB"""
+    if not path.exists():
+        return 0
+    size = sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+    return size / 1024 / 1024
+
+
+def _get_limit_error(error: str, limits: Dict, path: Path) -> str:
+    if "MemoryError" in error:
+        return f"The build exceeded the memory limit of {limits['max_address_space']} MB"
+    if limits["max_output_size"] and (
+        "File too large" in error or _get_size(path / "build") > limits["max_output_size"]
+    ):
+        return f"The build exceeded the output size limit of {limits['max_output_size']} MB"
+    return ""
+
+
+def _convert(path: str, kwargs: Dict, limits: Dict) -> str:
+    """Converts the project in path within the limits. Returns an error message if it failed"""
+    # pylint: disable=import-outside-toplevel
+    from panel_sharing.convert import _convert_project
+
+    os.chdir(path)
+    _apply_limits(**limits)
+    try:
+        _convert_project(**kwargs)
+        return ""
+    except MemoryError:
+        return "MemoryError"
+    except OSError as ex:
+        return os.strerror(errno.EFBIG) if ex.errno == errno.EFBIG else str(ex)
+    except Exception as ex:  # pylint: disable=broad-except
+        return str(ex)
+    finally:
+        sys.stdout = sys.__stdout__
+
+
+def _convert_in_child(path: str, kwargs: Dict, limits: Dict, timeout: float) -> Tuple[str, str]:
+    """Converts the project in a child forked from the warm worker
+
+    The child starts with the imports of the worker but none of the state of earlier conversions.
+    The limits only apply to the child. It is killed if it exceeds the timeout.
+
+    Returns:
+        The error message and the limit error message
+    """
+    reader, writer = multiprocessing.Pipe(duplex=False)
+    pid = os.fork()  # pylint: disable=no-member
+    if pid == 0:
+        # The child must never return to the worker loop
+        try:
+            reader.close()
+            writer.send(_convert(path, kwargs, limits))
+        finally:
+            os._exit(0)  # pylint: disable=protected-access
+    writer.close()
+    error = limit_error = ""
+    if timeout and not reader.poll(timeout):
+        os.kill(pid, signal.SIGKILL)
+        limit_error = f"The build exceeded the time limit of {timeout} seconds"
+    else:
+        try:
+            error = reader.recv()
+        except EOFError:
+            error = "The converter stopped unexpectedly"
+    reader.close()
+    _, status = os.waitpid(pid, 0)
+    if os.WIFSIGNALED(status) and os.WTERMSIG(status) == getattr(signal, "SIGXCPU", None):
+        limit_error = f"The build exceeded the cpu time limit of {limits['max_cpu']} seconds"
+    return error, limit_error or _get_limit_error(error=error, limits=limits, path=Path(path))
+
+
+def _worker_main(connection):
+    """Runs the conversions received on the connection until it is closed
+
+    Each conversion runs in a new child process forked from this warm worker. Thus no module,
+    Bokeh or builtins state set by the code of one user is seen by the build of another user.
+    """
+    # Warm up the imports before the first conversion arrives
+    # pylint: disable=import-outside-toplevel,unused-import
+    import panel_sharing.convert  # noqa: F401
+
+    while True:
+        try:
+            task = connection.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if task is None:
+            return
+        if task == PING:
+            connection.send(PONG)
+            continue
+
+        path, kwargs, limits, timeout = task
+        if hasattr(os, "fork"):
+            error, limit_error = _convert_in_child(path, kwargs, limits, timeout)
+        else:
+            # Windows cannot fork. The spawned worker is recycled after every build instead
+            error = _convert(path, kwargs, limits)
+            limit_error = _get_limit_error(error=error, limits=limits, path=Path(path))
+        connection.send((error, limit_error, _get_max_rss()))
+
+
+class _Worker:
+    """A handle to a converter process"""
+
+    def __init__(self):
+        self.connection, child_connection = ctx_forkserver.Pipe()
+        self.process = ctx_forkserver.Process(
+            target=_worker_main, args=(child_connection,), daemon=True
+        )
+        self.process.start()
+        child_connection.close()
+        self.builds = 0
+        self.max_rss = 0
+
+    def is_alive(self) -> bool:
+        """Returns True if the process is running"""
+        return self.process.is_alive()
+
+    def ping(self, timeout: float) -> bool:
+        """Returns True if the process responds within the timeout"""
+        try:
+            self.connection.send(PING)
+            return self.connection.poll(timeout) and self.connection.recv() == PONG
+        except (EOFError, OSError):
+            return False
+
+    def convert(self, path: Path, kwargs: Dict, limits: Dict, timeout: float) -> str:
+        """Converts the project in path. Returns an error message if the conversion failed
+
+        Raises:
+            ConverterLimitExceeded: If the conversion exceeds the timeout or the limits
+        """
+        try:
+            self.connection.send((str(path), kwargs, limits, timeout))
+            # The worker kills the child on timeout. This guards against a worker not responding
+            if timeout and not self.connection.poll(timeout + TIMEOUT_GRACE):
+                self.kill()
+                raise ConverterLimitExceeded(
+                    f"The build exceeded the time limit of {timeout} seconds"
+                )
+            error, limit_error, self.max_rss = self.connection.recv()
+        except (EOFError, OSError) as ex:
+            self.process.join(timeout=1)
+            if self.process.exitcode == -getattr(signal, "SIGXCPU", 0):
+                raise ConverterLimitExceeded(
+                    f"The build exceeded the cpu time limit of {limits['max_cpu']} seconds"
+                ) from ex
+            raise ConverterError(
+                f"The converter stopped unexpectedly with exit code {self.process.exitcode}"
+            ) from ex
+        self.builds += 1
+        if limit_error:
+            raise ConverterLimitExceeded(limit_error)
+        return error
+
+    def kill(self):
+        """Kills the process"""
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    def stop(self):
+        """Stops the process"""
+        try:
+            self.connection.send(None)
+        except (EOFError, OSError):
+            pass
+        self.connection.close()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+
+class ConverterPool(param.Parameterized):
+    """A pool of long lived converter processes"""
+
+    size = param.Integer(config.CONVERTER_POOL_SIZE, bounds=(1, None))
+    max_memory = param.Integer(
+        config.CONVERTER_MAX_MEMORY,
+        bounds=(1, None),
+        doc="Recycle a worker when its peak memory usage in MB exceeds this value",
+    )
+    health_check_period = param.Number(
+        config.CONVERTER_HEALTH_CHECK_PERIOD,
+        bounds=(0, None),
+        doc="Seconds between health checks of the idle workers. 0 disables the health checks",
+    )
+    health_check_timeout = param.Number(5.0, bounds=(0, None))
+    timeout = param.Number(
+        config.CONVERTER_TIMEOUT,
+        bounds=(0, None),
+        doc="The wall-clock time limit of a build in seconds. 0 disables the limit",
+    )
+    max_cpu = param.Integer(
+        config.CONVERTER_MAX_CPU,
+        bounds=(0, None),
+        doc="The cpu time limit of a build in seconds. 0 disables the limit",
+    )
+    max_address_space = param.Integer(
+        config.CONVERTER_MAX_ADDRESS_SPACE,
+        bounds=(0, None),
+        doc="The address space (virtual memory) limit of a build in MB. 0 disables the limit",
+    )
+    max_output_size = param.Number(
+        config.CONVERTER_MAX_OUTPUT_SIZE,
+        bounds=(0, None),
+        doc="The output size limit of a build in MB. 0 disables the limit",
+    )
+
+    def __init__(self, **params):
+        super().__init__(**params)
+
+        self._idle: List[_Worker] = []
+        self._workers = 0
+        self._condition = threading.Condition()
+        self._health_check_thread: threading.Thread | None = None
+
+    def _acquire(self) -> _Worker:
+        with self._condition:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.is_alive():
+                        return worker
+                    self._workers -= 1
+                if self._workers < self.size:
+                    self._workers += 1
+                    break
+                self._condition.wait()
+        self._start_health_checks()
+        try:
+            return _Worker()
+        except Exception:
+            with self._condition:
+                self._workers -= 1
+                self._condition.notify()
+            raise
+
+    def _must_recycle(self, worker: _Worker) -> bool:
+        return (
+            not worker.is_alive()
+            # Without fork the builds run in the worker itself. Never reuse it
+            or not hasattr(os, "fork")
+            or worker.max_rss >= self.max_memory
+        )
+
+    def _release(self, worker: _Worker):
+        if not self._must_recycle(worker):
+            with self._condition:
+                self._idle.append(worker)
+                self._condition.notify()
+            return
+
+        logger.info("Recycling converter after %s builds and %s MB", worker.builds, worker.max_rss)
+        worker.stop()
+        with self._condition:
+            self._workers -= 1
+            self._condition.notify()
+        # Keep the pool warm
+        threading.Thread(target=self.start, kwargs={"count": 1}, daemon=True).start()
+
+    def start(self, count: int | None = None):
+        """Starts count idle workers. Defaults to filling the pool"""
+        if count is None:
+            count = self.size
+        for _ in range(count):
+            with self._condition:
+                if self._workers >= self.size:
+                    return
+                self._workers += 1
+            try:
+                worker = _Worker()
+            except Exception:
+                with self._condition:
+                    self._workers -= 1
+                raise
+            self._release(worker)
+        self._start_health_checks()
+
+    def convert(self, path: Path, kwargs: Dict) -> str:
+        """Converts the project in path using a worker from the pool
+
+        Args:
+            path: The root folder of the project
+            kwargs: The arguments to `_convert_project`
+
+        Raises:
+            ConverterLimitExceeded: If the conversion exceeds the timeout or the limits
+            ConverterError: If the converter stops unexpectedly
+
+        Returns:
+            An error message if the conversion failed. Otherwise an empty string
+        """
+        limits = {
+            "max_cpu": self.max_cpu,
+            "max_address_space": self.max_address_space,
+            "max_output_size": self.max_output_size,
+        }
+        worker = self._acquire()
+        try:
+            return worker.convert(path=path, kwargs=kwargs, limits=limits, timeout=self.timeout)
+        finally:
+            self._release(worker)
+
+    def health_check(self) -> int:
+        """Replaces idle workers that are not alive or not responding
+
+        Returns:
+            The number of healthy idle workers
+        """
+        with self._condition:
+            workers, self._idle = self._idle, []
+
+        healthy = []
+        for worker in workers:
+            if worker.is_alive() and worker.ping(timeout=self.health_check_timeout):
+                healthy.append(worker)
+            else:
+                logger.warning("Replacing unhealthy converter")
+                worker.stop()
+
+        with self._condition:
+            self._idle.extend(healthy)
+            self._workers -= len(workers) - len(healthy)
+            self._condition.notify_all()
+        if len(healthy) < len(workers):
+            self.start(count=len(workers) - len(healthy))
+        return len(healthy)
+
+    def _health_check_loop(self):
+        while self.health_check_period:
+            time.sleep(self.health_check_period)
+            try:
+                self.health_check()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Converter health check failed")
+
+    def _start_health_checks(self):
+        with self._condition:
+            if self._health_check_thread or not self.health_check_period:
+                return
+            self._health_check_thread = threading.Thread(
+                target=self._health_check_loop, daemon=True
+            )
+        self._health_check_thread.start()
+
+    def close(self):
+        """Stops the idle workers"""
+        with self._condition:
+            workers, self._idle = self._idle, []
+            self._workers -= len(workers)
+        for worker in workers:
+            worker.stop()
+
+
+CONVERTER_POOL = ConverterPool()
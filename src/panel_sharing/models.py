@@ -2,103 +2,76 @@
 # Should not contain any Panel UI elements
 from __future__ import annotations
 
+import asyncio
 import base64
+import contextvars
 import json
-import multiprocessing
-import os
+import logging
+import mimetypes
 import pathlib
 import shutil
 import tempfile
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from io import BytesIO
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, List, Tuple, TypeVar
 
 import param
-from azure.core.exceptions import ResourceNotFoundError
-from azure.storage.blob import BlobServiceClient, ContentSettings
-from azure.storage.blob._list_blobs_helper import BlobPrefix
+from azure.core.exceptions import ResourceModifiedError, ResourceNotFoundError
+from azure.storage.blob import ContentSettings
+from bokeh import __version__ as bokeh_version
 from panel import __version__
 
-from panel_sharing import VERSION, config
-from panel_sharing.convert import _convert_project
-from panel_sharing.shared.azure.cdn import AzureCDN
-from panel_sharing.utils import Timer, set_directory
-
-if os.name == "nt":
-    CTX_METHOD = "spawn"
-else:
-    CTX_METHOD = "forkserver"
-
-ctx_forkserver = multiprocessing.get_context(CTX_METHOD)
-ctx_forkserver.set_forkserver_preload(
-    [
-        # "base64",
-        "bokeh",
-        "holoviews",
-        "hvplot",
-        # "io",
-        # "matplotlib",
-        "numpy",
-        "pandas",
-        "panel",
-        "param",
-        # "PIL",
-        # "skimage",
-    ]
+from panel_sharing import VERSION, building, config
+from panel_sharing.build_scheduler import BUILD_SCHEDULER, BULK, INTERACTIVE, PRIORITIES, SHARE
+from panel_sharing.publishing import publish_example
+from panel_sharing.shared.app_index import AppIndex
+from panel_sharing.shared.azure.blob import (
+    INDEX_BLOB,
+    BlobIndex,
+    download,
+    get_content_md5,
+    get_etag,
+    get_executor,
+    get_service_client,
+    is_changed,
+    read_upload,
 )
+from panel_sharing.shared.azure.cdn import AzureCDN
+from panel_sharing.shared.azure.local import LOCAL_URL, is_local
+from panel_sharing.shared.base_target import get_base_target, set_base_target
+from panel_sharing.shared.compression import is_precompressed
+from panel_sharing.shared.dev_builds import DEV_BUILDS
+from panel_sharing.shared.garbage_collector import get_garbage_collector
+from panel_sharing.shared.transfer import link_tree, read_files, replace_tree, write_text
+from panel_sharing.source import Source
+
+logger = logging.getLogger("panel_sharing.models")
 
 EXAMPLES = Path(__file__).parent / "examples"
 AZURE_CDN = AzureCDN()
+# Builds and shares are run here to keep the server event loop responsive
+BUILD_EXECUTOR = ThreadPoolExecutor(thread_name_prefix="panel_sharing_build")
 
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
 
-class Source(param.Parameterized):
-    """Represent the source files"""
-
-    name = param.String(config.REPOSITORY_NAME, constant=True)
-    code = param.String(config.CODE)
-    readme = param.String(config.README)
-    thumbnail = param.String(config.THUMBNAIL)
-    requirements = param.String(config.REQUIREMENTS)
-
-    def _items(self):
-        """Returns the list of filename: text value"""
-        return {
-            "app.py": self.code,
-            "readme.md": self.readme,
-            "thumbnail.png": self.thumbnail,
-            "requirements.txt": self.requirements,
-        }.items()
-
-    def save(self):
-        """Saves the source files to the current working directory"""
-        path = pathlib.Path()
-        path.mkdir(parents=True, exist_ok=True)
-        for file_path, text in self._items():
-            pathlib.Path(path / file_path).write_text(text, encoding="utf8")
-
-    @classmethod
-    def read(cls) -> "Source":
-        """Reads the Source from the current working directory"""
-        path = pathlib.Path()
-        source = cls(name="new")
-        source.code = (path / "app.py").read_text(encoding="utf8")
-        source.readme = (path / "readme.md").read_text(encoding="utf8")
-        source.requirements = (path / "requirements.txt").read_text(encoding="utf8")
-        return source
-
-    def to_dict(self) -> Dict:
-        """Returns the source as a dict"""
-        return {
-            "code": self.code,
-            "readme": self.readme,
-            # "thumbnail": self.thumbnail,
-            "requirements": self.requirements,
-        }
+T = TypeVar("T")
+_TMPDIR_LOCK = threading.Lock()
 
 
 class Project(param.Parameterized):
-    """A project consists of configuration and source files"""
+    """A project consists of configuration and source files
+
+    The files are saved and built in a working directory. It is only created when needed. Close
+    the project or use it as a context manager to delete it when no longer needed.
+    """
 
     name = param.String(config.PROJECT_NAME)
     source = param.ClassSelector(class_=Source)
@@ -119,75 +92,147 @@ class Project(param.Parameterized):
             params["source"] = Source()
         super().__init__(**params)
 
-        self._tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
-        self._tmppath = Path(self._tmpdir.name)
+        # The working directory of the saved and built files. Created on first use by _tmppath
+        self._tmpdir: tempfile.TemporaryDirectory | None = None
+        # The files read but not written to the working directory yet. Written on first use
+        self._files: Dict[str, bytes] = {}
         self._save_hash = ""
         self._build_hash = ""
+        self._build_base_target = ""
 
         if "name" not in params:
             with param.edit_constant(self):
                 self.name = config.PROJECT_NAME
 
-    def __del__(self):
-        self._tmpdir.cleanup()
-
     def __str__(self):
         return self.name
 
+    @property
+    def _tmppath(self) -> Path:
+        with _TMPDIR_LOCK:
+            if self._tmpdir is None:
+                self._tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+                for file, data in self._files.items():
+                    path = Path(self._tmpdir.name) / file
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    path.write_bytes(data)
+                self._files = {}
+            return Path(self._tmpdir.name)
+
+    def _read_file(self, file: str) -> bytes | None:
+        """Returns the content of the saved or built file, e.g. 'build/config.json'. None if none"""
+        data = self._files.get(file)
+        if data is not None or self._tmpdir is None:
+            return data
+        path = self._tmppath / file
+        return path.read_bytes() if path.exists() else None
+
+    def close(self):
+        """Deletes the working directory. Saving or building the project creates a new one"""
+        self._save_hash = ""
+        self._build_hash = ""
+        self._files = {}
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+            self._tmpdir = None
+
+    def __enter__(self) -> "Project":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @classmethod
+    def read(cls, path: Path | None = None) -> "Project":
+        """Reads the Project from the path. Defaults to the current working directory
+
+        The files are kept in memory. Thus the folder may be replaced or deleted after reading"""
+        path = Path(path or "")
+        project = Project(name="new")
+        project.source = Source.read(path / "source")
+        project._files = read_files(path)
+        project._set_hashes()
+        return project
+
     @classmethod
-    def read(cls) -> "Project":
-        """Reads the Project from the current working directory"""
+    def from_files(cls, files: Dict[str, bytes]) -> "Project":
+        """Creates a Project from the contents of its files
+
+        The files are only written to the working directory when the project is saved or built.
+
+        Args:
+            files: A dictionary of the relative file path, e.g. 'source/app.py', and the content
+
+        Returns:
+            The Project
+        """
         project = Project(name="new")
-        with set_directory(Path("source")):
-            project.source = Source.read()
-        shutil.copytree(Path(), Path(project._tmpdir.name), dirs_exist_ok=True)
-        project._save_hash = project._hash
-        if Path("build").exists():
-            project._build_hash = project._hash
+        project.source = Source(
+            name="new",
+            code=files["source/app.py"].decode("utf8"),
+            readme=files["source/readme.md"].decode("utf8"),
+            requirements=files["source/requirements.txt"].decode("utf8"),
+        )
+        project._files = dict(files)
+        project._set_hashes()
         return project
 
+    def _set_hashes(self):
+        """Marks the files read as saved and built"""
+        self._save_hash = self._hash
+        app_html = self._read_file("build/app.html")
+        if app_html is not None:
+            # A build of older source, build kwargs or versions is stale and is built again
+            self._build_hash = self.read_build_json().get("build_digest", "")
+            self._build_base_target = get_base_target(app_html.decode("utf8"))
+
     @property
     def _hash(self):
         return hash(json.dumps(self.to_dict()))
 
-    def _reset_tmpdir(self):
-        self._save_hash = ""
-        self._build_hash = ""
-        for child in self._tmppath.iterdir():
-            if child.is_file():
-                child.unlink()
-            else:
-                shutil.rmtree(child)
+    def _get_build_digest(self, kwargs: Dict, source: Source | None = None) -> str:
+        """Returns the digest of the conversion inputs. See `building.get_build_digest`"""
+        source = source or self.source
+        return building.get_build_digest(source.code, source.requirements, kwargs)
+
+    def _save_to_tmpdir(self) -> Source:
+        """Saves the changed source files to the tmpdir
 
-    def _save_to_tmpdir(self):
-        _hash = self._hash
-        if self._save_hash == _hash:
-            return
+        The build is only removed if the conversion inputs (code, requirements) changed. Changes
+        to other files like the readme do not require a new conversion.
 
-        self._reset_tmpdir()
-        with set_directory(self._tmppath / "source"):
-            self.source.save()
-        self._save_hash = _hash
+        Returns:
+            A copy of the saved source. The source of the project may be edited while it is built
+        """
+        source = Source(**self.source.param.values())
+        _hash = hash(json.dumps({"source": source.to_dict()}))
+        if self._save_hash != _hash:
+            source.save(self._tmppath / "source")
+            self._save_hash = _hash
+            digest = self._get_build_digest(self._build_kwargs, source)
+            if self._build_hash and self._build_hash != digest:
+                self._remove_tmpbuilddir()
+        return source
 
-    def save(self):
-        """Saves the project files to the current working directory"""
+    def save(self, path: Path | None = None):
+        """Saves the project files to the path. Defaults to the current working directory"""
         self._save_to_tmpdir()
-        self._copy_from_tmpdir()
+        self._copy_from_tmpdir(path)
 
     def _get_requirements(self):
         requirements = pathlib.Path("source/requirements.txt")
-        if requirements.exists() and requirements.read_text(encoding="utf8"):
+        if self._read_file(requirements.as_posix()):
             return str(requirements)
         return "auto"
 
     @property
     def _build_kwargs(self) -> Dict:
-        """
+        """Returns the arguments to `_convert_project`
 
-        Assumes we are in the Project root and the source files are in ./source
+        The paths are relative to the Project root. The source files are in ./source
 
         Returns:
-            _description_
+            The keyword arguments
         """
         return {
             "app": "source/app.py",
@@ -195,8 +240,11 @@ class Project(param.Parameterized):
             "requirements": self._get_requirements(),
         }
 
-    def save_build_json(self, kwargs: Dict):
-        """Saves the build configuration in a json file in the current working directory"""
+    def save_build_json(self, kwargs: Dict, path: Path | None = None, digest: str = ""):
+        """Saves the build configuration in a json file in the path
+
+        Defaults to the current working directory. The digest defaults to the one of the source"""
+        path = Path(path or "")
         if not kwargs:
             kwargs = self._build_kwargs
 
@@ -204,9 +252,22 @@ class Project(param.Parameterized):
             "app_builder": {"panel sharing": VERSION},
             "app_framework": {"panel": __version__},
             "build_kwargs": kwargs,
+            "build_digest": digest or self._get_build_digest(kwargs),
         }
-        with open("config.json", "w", encoding="utf8") as file:
-            json.dump(obj=build_json, fp=file, indent=1)
+        path.mkdir(parents=True, exist_ok=True)
+        write_text(path / "config.json", json.dumps(obj=build_json, indent=1))
+
+    def read_build_json(self) -> Dict:
+        """Returns the build configuration of the current build. {} if there is no build"""
+        build_json = self._read_file("build/config.json")
+        if not build_json:
+            return {}
+        return json.loads(build_json)
+
+    def is_build_current(self) -> bool:
+        """Returns True if the build is up to date with the source, build kwargs and versions"""
+        digest = self.read_build_json().get("build_digest", "")
+        return bool(digest) and digest == self._get_build_digest(self._build_kwargs)
 
     def _remove_tmpbuilddir(self):
         self._build_hash = ""
@@ -214,49 +275,64 @@ class Project(param.Parameterized):
         if tmpbuildpath.exists():
             shutil.rmtree(tmpbuildpath)
 
-    def _build_to_tmpdir(self, base_target):
-        _hash = self._hash + hash(base_target)
-        if self._build_hash == _hash:
-            return
+    def _build_to_tmpdir(self, source: Source, base_target, priority=INTERACTIVE):
+        """Builds the project in the tmpdir
 
-        self._remove_tmpbuilddir()
-        with set_directory(self._tmppath):
-            kwargs = self._build_kwargs
+        The conversion is keyed on the build digest. If only other files changed, for example the
+        readme, the existing build is kept and only the config.json is refreshed.
+
+        The conversion produces one canonical build. The base target is applied afterwards by
+        rewriting the app.html file. Thus switching the base target does not convert again.
 
-            # We need to be really careful when we convert. See
-            # https://github.com/holoviz/panel/issues/3939
-            with Timer("convert project"):
-                process = ctx_forkserver.Process(
-                    target=_convert_project,
-                    kwargs=kwargs,
+        The digest is the one of the saved source, not of the source edited in the meantime.
+        """
+        kwargs = self._build_kwargs
+        digest = self._get_build_digest(kwargs, source)
+        build = self._tmppath / "build"
+        if self._build_hash != digest:
+            self._remove_tmpbuilddir()
+            if not building.BUILD_CACHE.get(digest, build):
+                # Identical builds of other sessions are merged into one conversion
+                tmpdir = BUILD_SCHEDULER.run(
+                    key=digest,
+                    function=partial(
+                        building.convert,
+                        source=self._tmppath / "source",
+                        kwargs=kwargs,
+                        digest=digest,
+                    ),
+                    priority=priority,
                 )
-                process.start()
-                with set_directory(Path("build")):
-                    self.save_build_json(kwargs)
-                process.join()
-                if base_target != "":
-                    app_html = Path("build/app.html")
-                    text = app_html.read_text(encoding="utf8")
-                    text = text.replace("<head>", "<head><base target='_blank' />")
-                    app_html.write_text(text, encoding="utf8")
-
-        self._build_hash = _hash
-
-    def _copy_from_tmpdir(self):
-        dst = str(Path().absolute())
-        shutil.copytree(self._tmppath, dst, dirs_exist_ok=True)
-
-    def build(self, base_target=""):
-        """Saves and builds (i.e. converts) to the current working directory"""
-        self._save_to_tmpdir()
-        self._build_to_tmpdir(base_target=base_target)
-        self._copy_from_tmpdir()
+                link_tree(Path(tmpdir.name) / "build", build)
+            self._build_hash = digest
+            self._build_base_target = ""
 
-    def rebuild(self, base_target=""):
-        """Forces as rebuild"""
+        if self._build_base_target != base_target:
+            set_base_target(build / "app.html", base_target)
+            self._build_base_target = base_target
+        self.save_build_json(kwargs, build, digest=digest)
+
+    def _copy_from_tmpdir(self, path: Path | None = None):
+        link_tree(self._tmppath, Path(path or "").absolute())
+
+    def build(self, path: Path | None = None, base_target="", priority=INTERACTIVE):
+        """Saves and builds (i.e. converts) to the path. Defaults to the current working directory
+
+        Args:
+            path: The folder to save the source and build files to
+            base_target: The target of the links in the app. For example '_blank'
+            priority: The priority lane of the build. One of 'interactive', 'share' or 'bulk'
+        """
+        source = self._save_to_tmpdir()
+        self._build_to_tmpdir(source, base_target=base_target, priority=priority)
+        self._copy_from_tmpdir(path)
+
+    def rebuild(self, path: Path | None = None, base_target="", priority=INTERACTIVE):
+        """Forces as rebuild. The cached build of the project is converted again too"""
         self._save_hash = ""
         self._build_hash = ""
-        self.build(base_target=base_target)
+        building.BUILD_CACHE.discard(self._get_build_digest(self._build_kwargs))
+        self.build(path=path, base_target=base_target, priority=priority)
 
     def to_dict(self):
         """Returns the project as a dictionary"""
@@ -292,27 +368,24 @@ class Project(param.Parameterized):
     def to_zip_folder(self) -> BytesIO:
         """Returns the project as a .zip folder"""
         with tempfile.TemporaryDirectory() as tmpdir:
-            with set_directory(pathlib.Path(tmpdir)):
-                with set_directory(pathlib.Path("project")):
-                    self.save()
-                    self.build()
-                target_file = "saved"
-                result = shutil.make_archive(
-                    target_file, "zip", root_dir=Path("project").absolute()
-                )
-                with open(result, "rb") as file:
-                    return BytesIO(file.read())
+            project = pathlib.Path(tmpdir) / "project"
+            self.save(project)
+            self.build(project)
+            target_file = pathlib.Path(tmpdir) / "saved"
+            result = shutil.make_archive(str(target_file), "zip", root_dir=project)
+            with open(result, "rb") as file:
+                return BytesIO(file.read())
 
     @staticmethod
     def from_zip_folder(zip_folder: BytesIO):
         """Creates a Project from a zip_folder"""
         with tempfile.TemporaryDirectory() as tmpdir:
-            with set_directory(pathlib.Path(tmpdir)):
-                target_file = "saved.zip"
-                with open(target_file, "wb") as file:
-                    file.write(zip_folder.getbuffer())
-                    shutil.unpack_archive(target_file, format="zip")
-                    return Project.read()
+            target_file = pathlib.Path(tmpdir) / "saved.zip"
+            with open(target_file, "wb") as file:
+                file.write(zip_folder.getbuffer())
+            project = pathlib.Path(tmpdir) / "project"
+            shutil.unpack_archive(target_file, extract_dir=project, format="zip")
+            return Project.read(project)
 
     def copy(self, project: Project):
         """Copies the given project including any saved and build files"""
@@ -320,15 +393,16 @@ class Project(param.Parameterized):
         self.source.readme = project.source.readme
         self.source.requirements = project.source.requirements
         self.source.thumbnail = project.source.thumbnail
-        self._save_hash = ""
-        self._build_hash = ""
-        self._reset_tmpdir()
+        self.close()
 
         # pylint: disable=protected-access
-        with set_directory(self._tmppath):
-            project._copy_from_tmpdir()
+        if project._tmpdir is not None:
+            project._copy_from_tmpdir(self._tmppath)
+        else:
+            self._files = dict(project._files)
         self._save_hash = project._save_hash
         self._build_hash = project._build_hash
+        self._build_base_target = project._build_base_target
 
 
 class User(param.Parameterized):
@@ -383,16 +457,16 @@ class FileStorage(Storage):
     """The FileStorage represent a storage as files"""
 
     base_target = param.Selector(default="", objects=["", "_blank"])
+    priority = param.Selector(default=SHARE, objects=list(PRIORITIES))
 
     def __init__(self, path: str, **params):
         super().__init__(**params)
 
         self._path = pathlib.Path(path).absolute()
+        self._index = AppIndex(self._path / "index.db", root=self._path / "projects")
 
     def __getitem__(self, key):
-        with set_directory(self._path / "projects" / key):
-            project = Project.read()
-        return project
+        return Project.read(self._get_project_path(key))
 
     def _get_project_path(self, key) -> pathlib.Path:
         return self._path / "projects" / key
@@ -401,53 +475,97 @@ class FileStorage(Storage):
         return self._path / "www" / key
 
     def _move_locally(self, tmppath: pathlib.Path, project: pathlib.Path, www: pathlib.Path):
-        if project.exists():
-            shutil.rmtree(project)
-        shutil.copytree(tmppath, project)
-        if www.exists():
-            shutil.rmtree(www)
-        shutil.copytree(tmppath / "build", www)
+        """Moves the project files in tmppath to the project and www folders"""
+        tmpwww = tmppath.parent / "www"
+        link_tree(tmppath / "build", tmpwww)
+        replace_tree(tmppath, project)
+        replace_tree(tmpwww, www)
 
-    def __setitem__(self, key: str, value: Project):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmppath = pathlib.Path(tmpdir)
-            with set_directory(tmppath):
-                value.save()
-                value.build(base_target=self.base_target)
+    def _temporary_directory(self) -> tempfile.TemporaryDirectory:
+        """Returns a temporary directory on the same device as the storage
+
+        This enables moving the files into place without copying them.
+        """
+        tmp = self._path / ".tmp"
+        tmp.mkdir(parents=True, exist_ok=True)
+        return tempfile.TemporaryDirectory(dir=tmp)
+
+    def _save(self, key: str, value: Project, base_target: str):
+        with self._temporary_directory() as tmpdir:
+            tmppath = pathlib.Path(tmpdir) / "project"
+            value.save(tmppath)
+            value.build(tmppath, base_target=base_target, priority=self.priority)
 
             project = self._get_project_path(key)
-            www = self._get_www_path(key)
+            self._move_locally(tmppath, project, self._get_www_path(key))
+            self._index.upsert(key, project)
 
-            self._move_locally(tmppath, project, www)
+    def __setitem__(self, key: str, value: Project):
+        self._save(key, value, base_target=self.base_target)
 
     def copy(self, key: str, project: Project):
-        project_dir = self._get_project_path(key)
-        www_dir = self._get_www_path(key)
-
-        with tempfile.TemporaryDirectory() as source:
-            source_path = Path(source)
-            with set_directory(source_path):
-                project.save()
-                project.build()
-                self._move_locally(source_path, project_dir, www_dir)
+        self._save(key, project, base_target="")
 
     def __delitem__(self, key):
-        raise NotImplementedError()
+        if not self._index.delete(key):
+            raise KeyError(key)
+        shutil.rmtree(self._get_project_path(key), ignore_errors=True)
+        shutil.rmtree(self._get_www_path(key), ignore_errors=True)
 
-    def keys(self):
-        raise NotImplementedError()
+    def keys(self, prefix: str = "", user: str | None = None):
+        """Returns the sorted keys of the storage. Optionally only those with the prefix or user"""
+        return self._index.keys(prefix=prefix, user=user)
 
 
 class TmpFileStorage(FileStorage):
-    """A FileStorage with temporary files that are cleaned up when no longer in use"""
+    """A FileStorage with temporary files that are cleaned up when no longer in use
+
+    The keys in use are acquired and released via the `collector`. See GarbageCollector. The
+    builds are written to the www folder. Serve them via the routes of
+    `panel_sharing.shared.dev_builds.get_routes`, which keep the served builds in memory, or as
+    static files.
+    """
+
+    priority = param.Selector(default=INTERACTIVE, objects=list(PRIORITIES))
+
+    def __init__(self, path: str, **params):
+        super().__init__(path, **params)
+        self.collector = get_garbage_collector(self._index, delete=self.__delitem__)
+        self.dev_builds = DEV_BUILDS
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.dev_builds.discard(key)
 
     def __getitem__(self, key):
         raise NotImplementedError()
 
+
+class FolderStorage(Storage):
+    """A storage of project folders in a single folder. For example the examples"""
+
+    base_target = param.Selector(default="", objects=["", "_blank"])
+    priority = param.Selector(default=BULK, objects=list(PRIORITIES))
+
+    def __init__(self, path: str | Path, **params):
+        super().__init__(**params)
+
+        self._path = pathlib.Path(path).absolute()
+
+    def __getitem__(self, key):
+        return Project.read(self._path / key)
+
+    def __setitem__(self, key: str, value: Project):
+        value.build(self._path / key, base_target=self.base_target, priority=self.priority)
+
     def __delitem__(self, key):
         raise NotImplementedError()
 
     def keys(self):
+        """Returns the list of keys of the storage"""
+        return sorted(app.parent.parent.name for app in self._path.glob("*/source/app.py"))
+
+    def copy(self, key: str, project: Project):
         raise NotImplementedError()
 
 
@@ -455,11 +573,17 @@ class AzureBlobStorage(Storage):
     """An Azure Blob Storage"""
 
     base_target = param.Selector(default="", objects=["", "_blank"])
+    priority = param.Selector(default=SHARE, objects=list(PRIORITIES))
     blob_url = param.String(default=config.AZURE_BLOB_URL)
     web_url = param.String(default=config.AZURE_WEB_URL)
     project_container_name = param.String(default=config.AZURE_PROJECT_CONTAINER_NAME)
     web_container_name = param.String(default=config.AZURE_WEB_CONTAINER_NAME)
     conn_str = param.String(default=config.AZURE_BLOB_CONN_STR)
+    concurrency = param.Integer(
+        default=config.AZURE_CONCURRENCY,
+        bounds=(1, None),
+        doc="The number of files to upload or download concurrently",
+    )
 
     def __init__(self, **params):
         super().__init__(**params)
@@ -467,46 +591,57 @@ class AzureBlobStorage(Storage):
         if not self.conn_str:
             raise ValueError("Error. No conn_str provided!")
 
+        if is_local(self.conn_str):
+            # The blobs are served by the routes of panel_sharing.shared.azure.local.get_routes
+            if "blob_url" not in params:
+                self.blob_url = f"{LOCAL_URL}/"
+            if "web_url" not in params:
+                self.web_url = f"{LOCAL_URL}/{self.web_container_name}/"
+
         # Create the BlobServiceClient object
-        self.service_client = BlobServiceClient.from_connection_string(self.conn_str)
+        self.service_client = get_service_client(self.conn_str)
+        self._executor = get_executor(self.concurrency)
         self.project_container_client = self.service_client.get_container_client(
             self.project_container_name
         )
         self.web_container_client = self.service_client.get_container_client(
             self.web_container_name
         )
+        self._index = BlobIndex(self.project_container_client.get_blob_client(INDEX_BLOB))
 
     def __getitem__(self, key):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with set_directory(Path(tmpdir)):
-                self._save_locally(key)
-                return Project.read()
+        return Project.from_files(self._download_files(key))
 
-    def _save_locally(self, key: str):
+    def _list_blobs(self, key: str) -> List[Tuple]:
+        """Returns the container client, blob and relative file path of the files of the key"""
         prefix = key + "/"
 
-        project_generator = self.project_container_client.list_blobs(name_starts_with=prefix)
-        for blob in project_generator:
-            file = blob.name.replace(prefix, "")
-            Path(file).parent.mkdir(parents=True, exist_ok=True)
-            with open(file=file, mode="wb") as download_file:
-                download_file.write(
-                    self.project_container_client.download_blob(blob.name).readall()
-                )
+        def _list(container_client, folder):
+            blobs = container_client.list_blobs(name_starts_with=prefix)
+            return [
+                (container_client, blob, blob.name.replace(prefix, folder, 1)) for blob in blobs
+            ]
 
-        web_generator = self.web_container_client.list_blobs(name_starts_with=prefix)
-        for blob in web_generator:
-            file = blob.name.replace(prefix, "build/")
-            Path(file).parent.mkdir(parents=True, exist_ok=True)
-            with open(file=file, mode="wb") as download_file:
-                try:
-                    download_file.write(
-                        self.web_container_client.download_blob(blob.name).readall()
-                    )
-                except ResourceNotFoundError as ex:
-                    raise Exception(
-                        f"The container {self.web_container_name} or blob {blob} was not found"
-                    ) from ex
+        project = self._executor.submit(_list, self.project_container_client, "")
+        web = self._executor.submit(_list, self.web_container_client, "build/")
+        return project.result() + web.result()
+
+    def _download_file(self, container_client, blob, file: str) -> Tuple[str, bytes]:
+        try:
+            return file, download(container_client, blob)
+        except ResourceNotFoundError as ex:
+            raise Exception(
+                f"The container {container_client.container_name} or blob {blob} was not found"
+            ) from ex
+
+    def _download_files(self, key: str) -> Dict[str, bytes]:
+        """Downloads the files of the key concurrently into memory
+
+        Returns:
+            A dictionary of the relative file path, e.g. 'source/app.py', and the content
+        """
+        blobs = self._list_blobs(key)
+        return dict(self._executor.map(lambda blob: self._download_file(*blob), blobs))
 
     @staticmethod
     def _is_build_file(file: Path):
@@ -531,38 +666,61 @@ class AzureBlobStorage(Storage):
         blob = self._get_blob(key, file)
         return self.service_client.get_blob_client(container=container_name, blob=blob)
 
-    def _get_content_settings(self, file: Path) -> ContentSettings | None:
-        if file.name.endswith("html"):
-            return ContentSettings(content_type="text/html")
-        return None
+    def _get_content_settings(self, file: Path, content_encoding: str = "") -> ContentSettings:
+        content_type, _ = mimetypes.guess_type(file.name)
+        return ContentSettings(
+            content_type=content_type or "application/octet-stream",
+            content_encoding=content_encoding or None,
+            cache_control=config.BUILD_CACHE_CONTROL,
+        )
+
+    def _upload(self, key: str, file: Path, data: bytes, content_encoding: str):
+        blob_client = self._get_blob_client(key=key, file=file)
+        content_settings = self._get_content_settings(file, content_encoding)
+        content_settings.content_md5 = bytearray(get_content_md5(data))
+        blob_client.upload_blob(data, overwrite=True, content_settings=content_settings)
 
     def __setitem__(self, key, value: Project):
+        """Uploads the files of the project that changed and purges them from the CDN"""
         with tempfile.TemporaryDirectory() as tmpdir:
-            with set_directory(Path(tmpdir)):
-                value.save()
-                value.build(self.base_target)
-                for file in Path().rglob("*"):
-                    if file.is_file():
-                        blob_client = self._get_blob_client(key=key, file=file)
-                        content_settings = self._get_content_settings(file)
-                        with open(file, mode="rb") as data:
-                            blob_client.upload_blob(
-                                data, overwrite=True, content_settings=content_settings
-                            )
-                AZURE_CDN.purge(content_paths=[f"/{key}/*"])
+            path = Path(tmpdir)
+            value.save(path)
+            value.build(path, base_target=self.base_target, priority=self.priority)
+            blobs = {file: blob for _, blob, file in self._list_blobs(key)}
+            changed = []
+            for file in path.rglob("*"):
+                if file.is_file() and not is_precompressed(file):
+                    relative_file = file.relative_to(path)
+                    data, encoding = read_upload(file)
+                    if is_changed(blobs.get(relative_file.as_posix()), data, encoding):
+                        changed.append((relative_file, data, encoding))
+            # The files are uploaded concurrently. list raises the first error if any
+            list(self._executor.map(lambda upload: self._upload(key, *upload), changed))
+            paths = [f"/{key}/{file.name}" for file, *_ in changed if self._is_build_file(file)]
+            # The routes of the local blob service are not behind a CDN
+            if paths and not is_local(self.conn_str):
+                AZURE_CDN.purge(content_paths=paths)
+            if changed:
+                # Every share downloads and replaces the whole index blob
+                try:
+                    self._index.update(upsert={key: {"updated": time.time()}})
+                except ResourceModifiedError:
+                    # The app is shared. Only the index is stale until rebuild_index repairs it
+                    logger.exception("Failed to add %s to the index", key)
 
     def __delitem__(self, key):
         raise NotImplementedError()
 
     def keys(self):
         """Returns the list of keys of the storage"""
-        raise NotImplementedError()
+        return self.get_keys()
+
+    def get_etag(self, key: str) -> str:
+        """Returns an etag of the project. It changes when any of its files change"""
+        return get_etag(blob for _, blob, _ in self._list_blobs(key))
 
     def copy(self, key: str, project: Project):
         raise NotImplementedError()
-        # project = self._get_project_path(key)
-        # www = self._get_www_path(key)
-        # self._move_locally(source, project, www)
 
     def delete(self, key):
         """Delete the key"""
@@ -572,6 +730,7 @@ class AzureBlobStorage(Storage):
             container_name = self._get_container_name(file)
             blob_client = self.service_client.get_blob_client(container=container_name, blob=blob)
             blob_client.delete_blob(snapshot=None)
+        self._index.update(remove=[key])
 
     def get_url(self, key, file):
         """Returns the app url of the given key and file"""
@@ -583,14 +742,13 @@ class AzureBlobStorage(Storage):
         return self.blob_url + container_name + "/" + key + "/" + str(file_path)
 
     def get_keys(self) -> List[str]:
-        """Returns the app keys from the blob storage"""
-        keys = []
-        for user in self.web_container_client.walk_blobs("", delimiter="/"):
-            if isinstance(user, BlobPrefix):
-                for app in user:
-                    if isinstance(app, BlobPrefix):
-                        keys.append(app.name[:-1])
-        return keys
+        """Returns the app keys from the index. Rebuilds the index if it does not exist"""
+        keys, _ = self._index.read()
+        return sorted(self.rebuild_index() if keys is None else keys)
+
+    def rebuild_index(self) -> Dict[str, Dict]:
+        """Regenerates the index of the app keys from a full listing of the web container"""
+        return self._index.rebuild(self.web_container_client)
 
 
 class Site(param.Parameterized):
@@ -608,7 +766,15 @@ class Site(param.Parameterized):
 
     auth_provider = param.Parameter(constant=True)
 
+    examples_url: str = param.String(
+        constant=True,
+        doc="""The url the www folder of the examples_storage is served at. For example
+        'apps-examples'. If empty the examples are copied to the development_storage instead""",
+    )
+
     def __init__(self, **params):
+        if "examples_url" not in params:
+            params["examples_url"] = config.EXAMPLES_URL
         if "development_storage" not in params:
             params["development_storage"] = TmpFileStorage(path="apps/dev", base_target="_blank")
         if "examples_storage" not in params:
@@ -628,7 +794,7 @@ class Site(param.Parameterized):
 
     def get_shared_src(self, key):
         """Returns the shared url"""
-        if isinstance(self.production_storage, AzureBlobStorage):
+        if hasattr(self.production_storage, "get_url"):
             return self.production_storage.get_url(key, "build/app.html")
         return f"apps/{key}/app.html"
 
@@ -636,6 +802,10 @@ class Site(param.Parameterized):
         """Returns the development url"""
         return f"apps-dev/{key}/app.html"
 
+    def get_example_src(self, key):
+        """Returns the url of an example published to the examples_storage"""
+        return f"{self.examples_url}/{key}/app.html"
+
 
 class AppState(param.Parameterized):
     """Represents the state of the Sharing App"""
@@ -650,6 +820,8 @@ class AppState(param.Parameterized):
     shared_key: str = param.String()
     shared_url: str = param.String()
 
+    build_status: str = param.Selector(default="", objects=["", PENDING, RUNNING, DONE, FAILED])
+
     examples: pathlib.Path = param.ClassSelector(default=EXAMPLES, class_=pathlib.Path)
 
     def __init__(self, **params):
@@ -662,10 +834,18 @@ class AppState(param.Parameterized):
 
         super().__init__(**params)
 
-    def _set_development(self, key: str):
+        # A project cannot be saved, built or replaced by more than one thread at a time
+        self._build_lock = threading.Lock()
+        # Incremented when the project is replaced. The builds of the replaced project are not shown
+        self._generation = 0
+
+    def _set_development(self, key: str, url: str = ""):
+        """Shows the development build of the key. Or the url if there is no key"""
+        if isinstance(self.site.development_storage, TmpFileStorage):
+            self.site.development_storage.collector.replace(self.development_key, key)
         self.development_key = key
         if not key:
-            self.development_url = ""
+            self.development_url = url
         else:
             self.development_url = self.site.get_development_src(key)
 
@@ -682,30 +862,102 @@ class AppState(param.Parameterized):
     def _get_random_key(self):
         return str(uuid.uuid4())
 
+    def _copy(self, project: Project) -> Tuple[str, str]:
+        """Returns the development key and the url of the published example. One of them is ''"""
+        with self._build_lock:
+            self._generation += 1
+            self.project.copy(project)
+            if not self.site.examples_url:
+                # The published examples are not served. Copy the example to the development storage
+                key = self._get_random_key()
+                self.site.development_storage.copy(key=key, project=self.project)
+                return key, ""
+            key = publish_example(self.site.examples_storage, project)
+            return "", self.site.get_example_src(key)
+
     def copy(self, project: Project):
-        """Copies the project from the source path"""
-        self.project.copy(project)
+        """Copies the example project. Shows its published build until the project is built
 
-        key = self._get_random_key()
-        self.site.development_storage.copy(key=key, project=self.project)
-        self._set_development(key)
+        If the site does not serve the published examples, i.e. has no `examples_url`, the example
+        is copied and built to the development storage instead.
+        """
+        self._set_development(*self._copy(project))
+
+    async def acopy(self, project: Project):
+        """Copies the example project without blocking the event loop. See `copy`"""
+        self._set_development(*await self._run_off_loop(partial(self._copy, project)))
+
+    def _build_development(self) -> Tuple[str, int]:
+        with self._build_lock:
+            key = self._get_random_key()
+            self.site.development_storage[key] = self.project
+            return key, self._generation
+
+    def _show_development(self, key: str, generation: int):
+        """Shows the development build unless the project was replaced while it was built"""
+        if generation == self._generation:
+            self._set_development(key)
+        elif isinstance(self.site.development_storage, TmpFileStorage):
+            # Released right away such that the build is deleted after the grace period
+            self.site.development_storage.collector.acquire(key)
+            self.site.development_storage.collector.release(key)
 
     def build(self):
         """Build the current project and reload the app"""
         # We need to use a new key to trigger the iframe to refresh
         # The panel server somehow messes with the file
         self._set_development("")
-        key = self._get_random_key()
-        self.site.development_storage[key] = self.project
-        self._set_development(key)
+        self._show_development(*self._build_development())
+
+    def _share(self, key: str):
+        with self._build_lock:
+            self.site.production_storage[key] = self.project
 
     def share(self):
         """Shared the current project"""
         key = self.shared_key
         url = self.shared_url
-        self.site.production_storage[key] = self.project
+        self._share(key)
+        return url
+
+    async def _run_off_loop(self, function: Callable[[], T]) -> T:
+        """Runs the function in the BUILD_EXECUTOR while reporting the build_status"""
+        loop = asyncio.get_running_loop()
+        # Makes sure the status is set in the context of the current session
+        context = contextvars.copy_context()
+
+        def run():
+            loop.call_soon_threadsafe(
+                partial(setattr, self, "build_status", RUNNING), context=context
+            )
+            return function()
+
+        self.build_status = PENDING
+        try:
+            result = await loop.run_in_executor(BUILD_EXECUTOR, run)
+        except Exception:
+            self.build_status = FAILED
+            raise
+        self.build_status = DONE
+        return result
+
+    async def abuild(self):
+        """Build the current project without blocking the event loop and reload the app"""
+        self._set_development("")
+        self._show_development(*await self._run_off_loop(self._build_development))
+
+    async def ashare(self):
+        """Shares the current project without blocking the event loop"""
+        key = self.shared_key
+        url = self.shared_url
+        await self._run_off_loop(partial(self._share, key))
         return url
 
+    def close(self):
+        """Releases the development build and the project files. Call it when the session ends"""
+        self._set_development("")
+        self.project.close()
+
     def login(self):
         """Logs the user in"""
         with param.edit_constant(self.user):
@@ -716,19 +968,25 @@ class AppState(param.Parameterized):
         with param.edit_constant(self.user):
             self.user.authenticated = False
 
-    def set_dev_project_from_shared_app(self, key):
-        """Set the current project from an app key"""
-        project = self.site.production_storage[key]
+    def _copy_shared_app(self, key: str) -> str:
+        """Returns the development key of the copy of the shared app"""
+        with self._build_lock, self.site.production_storage[key] as project:
+            self._generation += 1
+            self.project.source.code = project.source.code
+            self.project.source.readme = project.source.readme
+            self.project.source.requirements = project.source.requirements
 
-        self.project.source.code = project.source.code
-        self.project.source.readme = project.source.readme
-        self.project.source.requirements = project.source.requirements
+            key = self._get_random_key()
+            self.site.development_storage.copy(key=key, project=project)
+            return key
 
-        # pylint: disable=protected-access
-        key = self._get_random_key()
+    def set_dev_project_from_shared_app(self, key):
+        """Set the current project from an app key"""
+        self._set_development(self._copy_shared_app(key))
 
-        self.site.development_storage.copy(key=key, project=project)
-        self._set_development(key)
+    async def aset_dev_project_from_shared_app(self, key):
+        """Sets the current project from an app key without blocking the event loop"""
+        self._set_development(await self._run_off_loop(partial(self._copy_shared_app, key)))
 
 
 class Gallery(param.Parameterized):
@@ -0,0 +1,42 @@
+"""Publishes the example projects once such that all sessions share their builds
+
+An example is saved and built to the examples storage under a content addressed key, i.e. a
+digest of its source and build inputs. Once published the files are never modified. A session
+shows the published build until the user builds the project (copy on write). Changing an example
+or upgrading Panel publishes it under a new key.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from panel_sharing.models import FileStorage, Project
+
+# Sessions selecting the same example wait for the first one to publish it
+_PUBLISH_LOCK = threading.Lock()
+
+
+def get_example_key(project: Project) -> str:
+    """Returns the content addressed key of the example project"""
+    # pylint: disable=protected-access
+    value = {
+        "source": project.source.to_dict(),
+        "build": project._get_build_digest(project._build_kwargs),
+    }
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf8")).hexdigest()[:32]
+
+
+def publish_example(storage: FileStorage, project: Project) -> str:
+    """Saves and builds the example to the storage unless already published
+
+    Returns:
+        The content addressed key of the example
+    """
+    key = get_example_key(project)
+    with _PUBLISH_LOCK:
+        if key not in storage.keys(prefix=key):
+            storage.copy(key=key, project=project)
+    return key
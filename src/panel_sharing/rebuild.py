@@ -0,0 +1,206 @@
+"""Functionality to rebuild the apps of a Storage in bulk
+
+When Panel, Bokeh or Panel Sharing is upgraded the apps need to be rebuilt. A rebuild
+
+- selects the stale apps by comparing the build digest in their config.json.
+- converts the apps concurrently in the ConverterPool with the 'bulk' priority.
+- checkpoints the progress to a file such that an interrupted rebuild can be resumed.
+- returns and optionally saves a report of the failures and timings.
+
+A failed conversion does not replace the existing build of an app.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+from panel_sharing import config
+from panel_sharing.build_scheduler import BULK
+from panel_sharing.models import Storage
+from panel_sharing.shared.transfer import write_text
+
+logger = logging.getLogger("panel_sharing.rebuild")
+
+REBUILT = "rebuilt"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+def _get_build_error(build: Path) -> str:
+    app_html = build / "app.html"
+    if not app_html.exists():
+        return "The build did not produce an app.html file"
+    if "alert-convert-failed" in app_html.read_text(encoding="utf8"):
+        return "The conversion failed"
+    return ""
+
+
+def rebuild_app(storage: Storage, key: str, force: bool = False) -> Dict:
+    """Rebuilds the app if its build is stale
+
+    Args:
+        storage: The storage of the app
+        key: The key of the app
+        force: If True the app is rebuilt even if its build is up to date. Its cached build is
+            converted again too
+
+    Returns:
+        A dictionary with the key, status, error and duration in seconds
+    """
+    start = time.perf_counter()
+    status, error = REBUILT, ""
+    try:
+        with storage[key] as project:
+            if not force and project.is_build_current():
+                status = SKIPPED
+            else:
+                with tempfile.TemporaryDirectory() as tmpdir:
+                    base_target = getattr(storage, "base_target", "")
+                    # A stale build is restored from the BUILD_CACHE if an identical app was built
+                    build = project.rebuild if force else project.build
+                    build(Path(tmpdir), base_target=base_target, priority=BULK)
+                    error = _get_build_error(Path(tmpdir) / "build")
+                    if not error:
+                        storage[key] = project
+    except Exception as ex:  # pylint: disable=broad-except
+        logger.exception("Failed to rebuild %s", key)
+        error = str(ex) or type(ex).__name__
+    if error:
+        status = FAILED
+    return {
+        "key": key,
+        "status": status,
+        "error": error,
+        "duration": round(time.perf_counter() - start, 3),
+    }
+
+
+def _read_checkpoint(checkpoint: Path | None) -> Dict[str, Dict]:
+    """Returns the results of the apps rebuilt or skipped in a previous run"""
+    if not checkpoint or not checkpoint.exists():
+        return {}
+    results = {}
+    for line in checkpoint.read_text(encoding="utf8").splitlines():
+        if line.strip():
+            result = json.loads(line)
+            results[result["key"]] = result
+    # Failed apps are tried again
+    return {key: result for key, result in results.items() if result["status"] != FAILED}
+
+
+def _get_report(results: List[Dict], duration: float) -> Dict:
+    def _count(status):
+        return sum(1 for result in results if result["status"] == status)
+
+    return {
+        "total": len(results),
+        REBUILT: _count(REBUILT),
+        SKIPPED: _count(SKIPPED),
+        FAILED: _count(FAILED),
+        "duration": round(duration, 3),
+        "failures": {
+            result["key"]: result["error"] for result in results if result["status"] == FAILED
+        },
+        "timings": {result["key"]: result["duration"] for result in results},
+    }
+
+
+def rebuild(
+    storage: Storage,
+    *,
+    keys: Iterable[str] | None = None,
+    checkpoint: Path | None = None,
+    report: Path | None = None,
+    max_workers: int = config.BUILD_MAX_CONCURRENT,
+    force: bool = False,
+) -> Dict:
+    """Rebuilds the stale apps of the storage
+
+    Args:
+        storage: The storage to rebuild
+        keys: The keys of the apps to rebuild. Defaults to all the keys of the storage
+        checkpoint: A file to record the progress in. Apps recorded as rebuilt or skipped are not
+            rebuilt again. Use the same file to resume an interrupted rebuild.
+        report: A file to save the report to as json
+        max_workers: The number of apps to rebuild concurrently
+        force: If True all apps are rebuilt even if their builds are up to date
+
+    Returns:
+        The report with the number of apps rebuilt, skipped and failed, the failures and the
+        timings
+    """
+    start = time.perf_counter()
+    if keys is None:
+        keys = storage.keys()
+    done = _read_checkpoint(checkpoint)
+    todo = [key for key in keys if key not in done]
+    logger.info("Rebuilding %s apps. %s already done", len(todo), len(done))
+
+    lock = threading.Lock()
+    results = list(done.values())
+
+    def _rebuild(key: str):
+        result = rebuild_app(storage=storage, key=key, force=force)
+        logger.info("%s %s in %s seconds", result["status"], key, result["duration"])
+        with lock:
+            results.append(result)
+            if checkpoint:
+                checkpoint.parent.mkdir(parents=True, exist_ok=True)
+                with open(checkpoint, "a", encoding="utf8") as file:
+                    file.write(json.dumps(result) + "\n")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(_rebuild, todo))
+
+    summary = _get_report(results=results, duration=time.perf_counter() - start)
+    if report:
+        report.parent.mkdir(parents=True, exist_ok=True)
+        write_text(report, json.dumps(summary, indent=1))
+    return summary
+
+
+def run(
+    create_storage: Callable[[], Storage],
+    description: str,
+    name: str = "apps",
+    args: List[str] | None = None,
+) -> Dict:
+    """Rebuilds the storage with the options of the command line and prints the report
+
+    Run the script with `--help` for the options.
+
+    Args:
+        create_storage: Returns the storage to rebuild. Called after the options are parsed
+        description: The description of the script
+        name: The name of the items of the storage. For example 'apps' or 'examples'
+        args: The command line arguments. Defaults to sys.argv
+
+    Returns:
+        The report
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("keys", nargs="*", help=f"The {name} to rebuild. Defaults to all")
+    parser.add_argument("--checkpoint", type=Path, help="A file to resume the rebuild from")
+    parser.add_argument("--report", type=Path, help="A file to save the report to")
+    parser.add_argument("--force", action="store_true", help=f"Rebuild up to date {name} too")
+    parser.add_argument("--max-workers", type=int, help="The number of concurrent rebuilds")
+    options = parser.parse_args(args)
+
+    kwargs = {"max_workers": options.max_workers} if options.max_workers else {}
+    summary = rebuild(
+        create_storage(),
+        keys=options.keys or None,
+        checkpoint=options.checkpoint,
+        report=options.report,
+        force=options.force,
+        **kwargs,
+    )
+    print(json.dumps(summary, indent=1))
+    return summary
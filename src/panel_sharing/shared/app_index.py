@@ -0,0 +1,148 @@
+"""A SQLite index of the apps saved in a folder"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from panel_sharing.shared import sqlite
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS apps (
+    key TEXT PRIMARY KEY,
+    user TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    panel_version TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS apps_user ON apps (user, key);
+"""
+_UPSERT = """
+INSERT INTO apps VALUES (:key, :user, :size, :digest, :panel_version, :updated, :updated)
+ON CONFLICT (key) DO UPDATE SET
+    user = excluded.user,
+    size = excluded.size,
+    digest = excluded.digest,
+    panel_version = excluded.panel_version,
+    updated = excluded.updated
+"""
+
+
+def _get_metadata(key: str, path: Path) -> Dict:
+    """Returns the metadata of the app in the path"""
+    build_json_path = path / "build" / "config.json"
+    build_json = {}
+    if build_json_path.exists():
+        build_json = json.loads(build_json_path.read_text(encoding="utf8"))
+    return {
+        "key": key,
+        "user": key.split("/", 1)[0] if "/" in key else "",
+        "size": sum(file.stat().st_size for file in path.rglob("*") if file.is_file()),
+        "digest": build_json.get("build_digest", ""),
+        "panel_version": build_json.get("app_framework", {}).get("panel", ""),
+        "updated": time.time(),
+    }
+
+
+class AppIndex:
+    """A SQLite index of the apps saved in a folder
+
+    The index records the key, user, size, build digest, Panel version and the created and updated
+    timestamps of each app. Listing the keys by prefix or user only reads the matching rows. Thus
+    it stays fast with tens of thousands of apps.
+
+    The database is created on first use. Then the apps already in the root folder are indexed.
+    It uses write-ahead logging such that readers do not block the writer. It can be shared by
+    several processes.
+
+    Args:
+        path: The path of the database file
+        root: The folder containing the app folders. An app folder contains source/app.py
+    """
+
+    def __init__(self, path: Path, root: Path):
+        self._path = Path(path).absolute()
+        self._root = Path(root).absolute()
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        """The path of the database file"""
+        return self._path
+
+    def _initialize(self):
+        with self._lock:
+            if self._initialized:
+                return
+            is_new = not self._path.exists()
+            sqlite.create(self._path, _SCHEMA)
+            self._initialized = True
+        if is_new:
+            self.rebuild()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        self._initialize()
+        with sqlite.transaction(self._path) as connection:
+            yield connection
+
+    def upsert(self, key: str, path: Path):
+        """Adds or updates the app saved in the path"""
+        metadata = _get_metadata(key, path)
+        with self._transaction() as connection:
+            connection.execute(_UPSERT, metadata)
+
+    def delete(self, key: str) -> bool:
+        """Removes the app. Returns False if it was not in the index"""
+        with self._transaction() as connection:
+            cursor = connection.execute("DELETE FROM apps WHERE key = ?", (key,))
+            return bool(cursor.rowcount)
+
+    def get(self, key: str) -> Dict | None:
+        """Returns the metadata of the app. None if it is not in the index"""
+        with self._transaction() as connection:
+            row = connection.execute("SELECT * FROM apps WHERE key = ?", (key,)).fetchone()
+        return dict(row) if row else None
+
+    def values(self) -> List[Dict]:
+        """Returns the metadata of all the apps sorted by the updated timestamp"""
+        with self._transaction() as connection:
+            rows = connection.execute("SELECT * FROM apps ORDER BY updated").fetchall()
+        return [dict(row) for row in rows]
+
+    def keys(self, prefix: str = "", user: str | None = None) -> List[str]:
+        """Returns the sorted keys starting with the prefix and of the user if given"""
+        query = "SELECT key FROM apps WHERE 1 = 1"
+        parameters: List[str] = []
+        if prefix:
+            # A range of the primary key is read instead of scanning the table
+            query += " AND key >= ? AND key < ?"
+            parameters += [prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)]
+        if user is not None:
+            query += " AND user = ?"
+            parameters.append(user)
+        with self._transaction() as connection:
+            rows = connection.execute(query + " ORDER BY key", parameters).fetchall()
+        return [row["key"] for row in rows]
+
+    def __len__(self) -> int:
+        with self._transaction() as connection:
+            return connection.execute("SELECT COUNT(*) FROM apps").fetchone()[0]
+
+    def rebuild(self):
+        """Replaces the index with the apps found in the root folder"""
+        apps = []
+        if self._root.exists():
+            for app in self._root.rglob("source/app.py"):
+                path = app.parent.parent
+                apps.append(_get_metadata(path.relative_to(self._root).as_posix(), path))
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM apps")
+            connection.executemany(_UPSERT, apps)
@@ -0,0 +1,208 @@
+"""Functionality to work with Azure Blob Storage"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+import requests
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceModifiedError, ResourceNotFoundError
+from azure.core.pipeline.transport import RequestsTransport  # pylint: disable=no-name-in-module
+from azure.storage.blob import BlobClient, BlobProperties, BlobServiceClient, ContainerClient
+from azure.storage.blob._list_blobs_helper import BlobPrefix
+from requests.adapters import HTTPAdapter
+
+from panel_sharing import config
+from panel_sharing.shared.azure.local import create_local_service_client, is_local
+
+INDEX_BLOB = "_index.json"
+INDEX_VERSION = 1
+
+
+_SERVICE_CLIENTS: Dict[str, Any] = {}
+_SERVICE_CLIENTS_LOCK = threading.Lock()
+_EXECUTORS: Dict[int, ThreadPoolExecutor] = {}
+
+
+def create_service_client(
+    conn_str: str,
+    max_connections: int = config.AZURE_MAX_CONNECTIONS,
+    connection_timeout: float = config.AZURE_CONNECTION_TIMEOUT,
+    read_timeout: float = config.AZURE_READ_TIMEOUT,
+) -> BlobServiceClient:
+    """Returns a new BlobServiceClient with its own connection pool
+
+    Args:
+        conn_str: The connection string of the storage account
+        max_connections: The number of connections kept alive. Should be at least the number of
+            concurrent requests for the requests to reuse their connections
+        connection_timeout: The number of seconds to wait for a connection
+        read_timeout: The number of seconds to wait for data from the server
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=max_connections)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    transport = RequestsTransport(
+        session=session, connection_timeout=connection_timeout, read_timeout=read_timeout
+    )
+    return BlobServiceClient.from_connection_string(conn_str, transport=transport)
+
+
+def get_service_client(conn_str: str) -> BlobServiceClient:
+    """Returns the BlobServiceClient of the connection string shared by the whole process
+
+    Sharing the client shares its connection pool. Thus new storage instances reuse the open
+    connections instead of paying for new TLS handshakes.
+
+    A `local://` connection string returns a LocalBlobServiceClient. See
+    `panel_sharing.shared.azure.local`.
+    """
+    with _SERVICE_CLIENTS_LOCK:
+        if conn_str not in _SERVICE_CLIENTS:
+            if is_local(conn_str):
+                _SERVICE_CLIENTS[conn_str] = create_local_service_client(conn_str)
+            else:
+                _SERVICE_CLIENTS[conn_str] = create_service_client(conn_str)
+        return _SERVICE_CLIENTS[conn_str]
+
+
+def get_executor(max_workers: int = config.AZURE_CONCURRENCY) -> ThreadPoolExecutor:
+    """Returns the executor of the uploads and downloads shared by the whole process
+
+    The storage instances with the same number of workers share the threads instead of each
+    starting their own.
+    """
+    with _SERVICE_CLIENTS_LOCK:
+        if max_workers not in _EXECUTORS:
+            _EXECUTORS[max_workers] = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="panel_sharing_azure"
+            )
+        return _EXECUTORS[max_workers]
+
+
+def read_upload(file: Path) -> Tuple[bytes, str]:
+    """Returns the data to upload for the file and its content encoding
+
+    The gzip precompressed sibling is uploaded if it exists. Blob storage cannot negotiate the
+    encoding. gzip is understood by all browsers.
+    """
+    compressed = file.with_name(file.name + ".gz")
+    if compressed.exists():
+        return compressed.read_bytes(), "gzip"
+    return file.read_bytes(), ""
+
+
+def download(container_client: ContainerClient, blob: BlobProperties) -> bytes:
+    """Returns the content of the blob. Decompresses it if it was uploaded precompressed"""
+    data = container_client.download_blob(blob.name).readall()
+    if blob.content_settings.content_encoding == "gzip":
+        return gzip.decompress(data)
+    return data
+
+
+def get_etag(blobs: Iterable[BlobProperties]) -> str:
+    """Returns an etag of the blobs. It changes when any blob is changed, added or removed"""
+    value = "\n".join(sorted(f"{blob.name}:{blob.etag}" for blob in blobs))
+    return hashlib.md5(value.encode("utf8")).hexdigest()  # nosec
+
+
+def get_content_md5(data: bytes) -> bytes:
+    """Returns the MD5 digest Azure stores as the Content-MD5 of a blob"""
+    return hashlib.md5(data).digest()  # nosec
+
+
+def is_changed(blob: BlobProperties | None, data: bytes, content_encoding: str) -> bool:
+    """Returns True if the blob does not exist or its content differs from data"""
+    if blob is None:
+        return True
+    settings = blob.content_settings
+    return (
+        not settings.content_md5
+        or bytes(settings.content_md5) != get_content_md5(data)
+        or (settings.content_encoding or "") != content_encoding
+    )
+
+
+class BlobIndex:
+    """An index of keys and their metadata stored as a single json blob
+
+    Reading all the keys requires downloading a single blob instead of listing a whole container.
+    In turn every update downloads and replaces the whole blob. Its cost grows with the number of
+    keys.
+
+    Updates are optimistic. The blob is only replaced if it has not been modified since it was
+    read. Otherwise the update is retried. Thus concurrent servers do not lose each others updates.
+
+    Updates are skipped while there is no index. Creating it from a single update would hide the
+    existing keys. Instead the index is rebuilt from a full listing when it is read the first time.
+    """
+
+    def __init__(self, blob_client: BlobClient, retries: int = 10):
+        self._blob_client = blob_client
+        self._retries = retries
+
+    def read(self) -> Tuple[Dict[str, Dict] | None, str | None]:
+        """Returns the keys with their metadata and the etag. (None, None) if there is no index"""
+        try:
+            downloader = self._blob_client.download_blob()
+        except ResourceNotFoundError:
+            return None, None
+        value = json.loads(downloader.readall())
+        return value["keys"], downloader.properties.etag
+
+    def write(self, keys: Dict[str, Dict]):
+        """Replaces the index with the keys"""
+        self._blob_client.upload_blob(self._dumps(keys), overwrite=True)
+
+    def rebuild(self, container_client: ContainerClient) -> Dict[str, Dict]:
+        """Replaces the index with the keys listed in the container and returns them"""
+        keys: Dict[str, Dict] = {key: {} for key in list_keys(container_client)}
+        self.write(keys)
+        return keys
+
+    @staticmethod
+    def _dumps(keys: Dict[str, Dict]) -> bytes:
+        value = {"version": INDEX_VERSION, "keys": keys}
+        return json.dumps(value, separators=(",", ":"), sort_keys=True).encode("utf8")
+
+    def update(self, upsert: Dict[str, Dict] | None = None, remove: Iterable[str] = ()):
+        """Adds or replaces the keys in upsert and removes the keys in remove
+
+        Raises:
+            ResourceModifiedError: If the index was modified concurrently more than `retries` times
+        """
+        for attempt in range(self._retries + 1):
+            keys, etag = self.read()
+            if keys is None:
+                return
+            keys.update(upsert or {})
+            for key in remove:
+                keys.pop(key, None)
+            try:
+                self._blob_client.upload_blob(
+                    self._dumps(keys),
+                    overwrite=True,
+                    etag=etag,
+                    match_condition=MatchConditions.IfNotModified,
+                )
+                return
+            except ResourceModifiedError:
+                if attempt == self._retries:
+                    raise
+
+
+def list_keys(container_client: ContainerClient) -> List[str]:
+    """Returns the 'user/app' keys of the container by listing all its blobs"""
+    keys = []
+    for user in container_client.walk_blobs("", delimiter="/"):
+        if isinstance(user, BlobPrefix):
+            for app in user:
+                if isinstance(app, BlobPrefix):
+                    keys.append(app.name[:-1])
+    return keys
@@ -1,7 +1,12 @@
 """Functionality to work with the Azure CDN"""
+from __future__ import annotations
+
 import logging
 import threading
-from typing import List
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, List
 
 import param
 from azure.identity import ClientSecretCredential
@@ -12,17 +17,56 @@ from panel_sharing.utils import Timer
 
 logger = logging.getLogger("AzureCDN")
 
+# The maximum number of content paths of a single purge request
+MAX_CONTENT_PATHS = 100
+
+
+@dataclass
+class _PurgeRequest:
+    """The number of paths of a call to `AzureCDN.purge` that have not been purged yet"""
+
+    future: Future
+    remaining: int
+    error: Exception | None = None
+
 
 class AzureCDN(param.Parameterized):
-    """Functionality to work with the Azure CDN"""
+    """Functionality to work with the Azure CDN
+
+    Purges are queued. A single background thread waits `window` seconds for more paths and then
+    purges all the queued paths in as few requests as possible. The same authenticated client is
+    used for all the requests.
+    """
 
     subscription_id = param.String(config.AZURE_SUBSCRIPTION_ID)
     resource_group_name = param.String(config.AZURE_RESOURCE_GROUP_NAME)
     profile_name = param.String(config.AZURE_CDN_PROFILE_NAME)
     endpoint_name = param.String(config.AZURE_CDN_ENDPOINT_NAME)
+    window = param.Number(
+        default=config.AZURE_CDN_PURGE_WINDOW,
+        bounds=(0, None),
+        doc="The number of seconds to wait for more paths to purge in the same request",
+    )
+    max_content_paths = param.Integer(
+        default=MAX_CONTENT_PATHS,
+        bounds=(1, MAX_CONTENT_PATHS),
+        doc="The maximum number of content paths of a single purge request",
+    )
 
-    def purge(self, content_paths: List[str]):
-        """
+    def __init__(self, **params):
+        super().__init__(**params)
+
+        self._client: CdnManagementClient | None = None
+        self._condition = threading.Condition()
+        self._pending: Dict[str, List[_PurgeRequest]] = {}
+        self._thread: threading.Thread | None = None
+        self._stats = {"paths": 0, "purged_paths": 0, "purges": 0, "failures": 0}
+
+    def purge(self, content_paths: List[str]) -> Future:
+        """Queues the content paths to be purged
+
+        Returns:
+            A Future that is done when all the paths are purged
 
         Example:
 
@@ -30,37 +74,100 @@ class AzureCDN(param.Parameterized):
 
             from panel_sharing.shared.azure.cdn import AzureCDN
             content_paths=["/MarcSkovMadsen/videostream-interface/*"]
-            AzureCDN().purge(content_paths)
+            AzureCDN().purge(content_paths).result()
         """
-        with Timer(name="purge"):
-            thread = threading.Thread(
-                target=self._purge_core, kwargs=dict(content_paths=content_paths)
+        future: Future = Future()
+        content_paths = list(dict.fromkeys(content_paths))
+        if not content_paths:
+            future.set_result(None)
+            return future
+        request = _PurgeRequest(future=future, remaining=len(content_paths))
+        with self._condition:
+            self._stats["paths"] += len(content_paths)
+            for path in content_paths:
+                self._pending.setdefault(path, []).append(request)
+            if not self._thread:
+                self._thread = threading.Thread(
+                    target=self._run, name="panel_sharing_cdn_purge", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+        return future
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the counts of the queued, purged and pending paths and of the (failed) purges"""
+        with self._condition:
+            return {**self._stats, "pending": len(self._pending)}
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+            # Paths queued within the window are purged together
+            time.sleep(self.window)
+            with self._condition:
+                pending, self._pending = self._pending, {}
+            queued = list(pending)
+            for start in range(0, len(queued), self.max_content_paths):
+                batch = queued[start : start + self.max_content_paths]
+                self._purge_batch({path: pending[path] for path in batch})
+
+    def _purge_batch(self, batch: Dict[str, List[_PurgeRequest]]):
+        error = None
+        try:
+            self._purge_core(list(batch))
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.exception("Failed to purge %s paths", len(batch))
+            error = ex
+        done = []
+        with self._condition:
+            self._stats["purges"] += 1
+            if error:
+                self._stats["failures"] += 1
+            else:
+                self._stats["purged_paths"] += len(batch)
+            for requests in batch.values():
+                for request in requests:
+                    request.error = request.error or error
+                    request.remaining -= 1
+                    if not request.remaining:
+                        done.append(request)
+        for request in done:
+            if request.error:
+                request.future.set_exception(request.error)
+            else:
+                request.future.set_result(None)
+
+    def _get_client(self) -> CdnManagementClient:
+        # Only used by the purge thread
+        if self._client is None:
+            credential = ClientSecretCredential(
+                tenant_id=config.AZURE_TENANT_ID,
+                client_id=config.AZURE_APP_CLIENT_ID,
+                client_secret=config.AZURE_APP_CLIENT_SECRET,
+            )
+            self._client = CdnManagementClient(
+                credential=credential,
+                subscription_id=self.subscription_id,
             )
-            thread.start()
+        return self._client
 
     def _purge_core(self, content_paths: List[str]):
-        credential = ClientSecretCredential(
-            tenant_id=config.AZURE_TENANT_ID,
-            client_id=config.AZURE_APP_CLIENT_ID,
-            client_secret=config.AZURE_APP_CLIENT_SECRET,
-        )
-        client = CdnManagementClient(
-            credential=credential,
-            subscription_id=self.subscription_id,
-        )
-        logger.info("purge")
+        logger.info("purge %s paths", len(content_paths))
         with Timer(name="purge core"):
-            client.endpoints.begin_purge_content(
+            poller = self._get_client().endpoints.begin_purge_content(
                 resource_group_name=self.resource_group_name,
                 profile_name=self.profile_name,
                 endpoint_name=self.endpoint_name,
                 content_file_paths={"contentPaths": content_paths},
             )
+            poller.result()
 
 
 if __name__ == "__main__":
     logging.basicConfig(format="%(asctime)s - %(message)s", level=logging.INFO)
     logger.info("start")
     paths = ["/MarcSkovMadsen/videostream-interface/*"]
-    AzureCDN().purge(content_paths=paths)
+    AzureCDN().purge(content_paths=paths).result()
     logger.info("end")
@@ -0,0 +1,318 @@
+"""A local stand in for the Azure Blob Storage service
+
+Use it to test, benchmark and load test the AzureBlobStorage on a single machine without a
+network. Set the connection string to `local://<path>?latency=<seconds>`. For example
+
+.. code-block:: bash
+
+    AZURE_BLOB_CONN_STR="local://.cache/blobs?latency=0.03" panel serve app.py
+
+The blobs of all containers are stored in the SQLite database `<path>/blobs.db`. It can be shared
+by several processes. Every request waits `latency` seconds to simulate the round trip to Azure.
+
+Only the operations used by Panel Sharing are implemented.
+
+The AzureBlobStorage of a local connection string links to the blobs at `local-blobs/<container>/`.
+Add the routes serving them to the server via
+
+.. code-block:: python
+
+    pn.serve(apps, extra_patterns=get_routes(config.AZURE_BLOB_CONN_STR))
+"""
+from __future__ import annotations
+
+import sqlite3
+import time
+import uuid
+from functools import partial
+from pathlib import Path
+from typing import Callable, ContextManager, List
+from urllib.parse import parse_qs, urlsplit
+
+from azure.core import MatchConditions
+from azure.core.exceptions import (
+    ResourceExistsError,
+    ResourceModifiedError,
+    ResourceNotFoundError,
+)
+from azure.storage.blob import BlobProperties, ContentSettings
+from azure.storage.blob._list_blobs_helper import BlobPrefix
+from tornado.ioloop import IOLoop
+from tornado.web import HTTPError, RequestHandler
+
+from panel_sharing.shared import sqlite
+
+LOCAL_SCHEME = "local://"
+# The url of a blob of the local blob service is local-blobs/<container>/<blob>
+LOCAL_URL = "local-blobs"
+ROUTE = rf"/{LOCAL_URL}/([^/]+)/(.+)"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    container TEXT, name TEXT, data BLOB, etag TEXT, last_modified REAL,
+    size INTEGER, content_type TEXT, content_encoding TEXT, cache_control TEXT,
+    content_md5 BLOB, PRIMARY KEY (container, name)
+);
+"""
+_PROPERTIES = (
+    "name, etag, last_modified, size, content_type, content_encoding, cache_control, content_md5"
+)
+
+
+def is_local(conn_str: str) -> bool:
+    """Returns True if the connection string is for the local blob service"""
+    return conn_str.startswith(LOCAL_SCHEME)
+
+
+def create_local_service_client(conn_str: str) -> LocalBlobServiceClient:
+    """Returns a LocalBlobServiceClient from a `local://<path>?latency=<seconds>` string"""
+    parts = urlsplit(conn_str)
+    latency = float(parse_qs(parts.query).get("latency", ["0"])[0])
+    return LocalBlobServiceClient(path=Path(parts.netloc + parts.path), latency=latency)
+
+
+def _to_properties(row: sqlite3.Row) -> BlobProperties:
+    properties = BlobProperties(name=row["name"])
+    properties.etag = row["etag"]
+    properties.size = row["size"]
+    properties.last_modified = row["last_modified"]
+    properties.content_settings = ContentSettings(
+        content_type=row["content_type"],
+        content_encoding=row["content_encoding"],
+        cache_control=row["cache_control"],
+        content_md5=row["content_md5"],
+    )
+    return properties
+
+
+class _Downloader:  # pylint: disable=too-few-public-methods
+    """The result of a download. Like azure.storage.blob.StorageStreamDownloader"""
+
+    def __init__(self, data: bytes, properties: BlobProperties):
+        self._data = data
+        self.properties = properties
+
+    def readall(self) -> bytes:
+        """Returns the content of the blob"""
+        return self._data
+
+
+class _LocalBlobPrefix(BlobPrefix):
+    """A virtual folder returned by `walk_blobs`. Iterating it lists the items in the folder"""
+
+    def __init__(self, name: str, list_items: Callable[[], List]):
+        # pylint: disable=super-init-not-called
+        self.name = name
+        self.prefix = name
+        self._list_items = list_items
+
+    def __iter__(self):
+        return iter(self._list_items())
+
+
+class LocalBlobServiceClient:
+    """A local stand in for azure.storage.blob.BlobServiceClient"""
+
+    def __init__(self, path: Path, latency: float = 0.0):
+        self._path = Path(path).absolute()
+        self._path.mkdir(parents=True, exist_ok=True)
+        self.latency = latency
+        sqlite.create(self._path / "blobs.db", _SCHEMA)
+
+    def transaction(self) -> ContextManager[sqlite3.Connection]:
+        """Returns a new connection to the database. Commits when the context exits"""
+        return sqlite.transaction(self._path / "blobs.db")
+
+    def wait(self):
+        """Waits the latency of a request"""
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_container_client(self, container: str) -> LocalContainerClient:
+        """Returns a client of the container"""
+        return LocalContainerClient(service=self, container_name=container)
+
+    def get_blob_client(self, container: str, blob: str) -> LocalBlobClient:
+        """Returns a client of the blob in the container"""
+        return LocalBlobClient(service=self, container_name=container, blob_name=blob)
+
+
+class LocalContainerClient:
+    """A local stand in for azure.storage.blob.ContainerClient"""
+
+    def __init__(self, service: LocalBlobServiceClient, container_name: str):
+        self._service = service
+        self.container_name = container_name
+
+    def _list(self, prefix: str) -> List[BlobProperties]:
+        with self._service.transaction() as connection:
+            rows = connection.execute(
+                f"SELECT {_PROPERTIES} FROM blobs "  # nosec
+                "WHERE container = ? AND substr(name, 1, ?) = ? ORDER BY name",
+                (self.container_name, len(prefix), prefix),
+            ).fetchall()
+        return [_to_properties(row) for row in rows]
+
+    def list_blobs(self, name_starts_with: str | None = None) -> List[BlobProperties]:
+        """Returns the properties of the blobs whose names start with name_starts_with"""
+        self._service.wait()
+        return self._list(name_starts_with or "")
+
+    def walk_blobs(self, name_starts_with: str | None = None, delimiter: str = "/") -> List:
+        """Returns the blobs and virtual folders directly in the name_starts_with folder"""
+        self._service.wait()
+        prefix = name_starts_with or ""
+        items: List = []
+        folders = set()
+        for blob in self._list(prefix):
+            rest = blob.name[len(prefix) :]
+            if delimiter not in rest:
+                items.append(blob)
+                continue
+            folder = prefix + rest.split(delimiter, 1)[0] + delimiter
+            if folder not in folders:
+                folders.add(folder)
+                items.append(_LocalBlobPrefix(folder, partial(self.walk_blobs, folder, delimiter)))
+        return items
+
+    def get_blob_client(self, blob: str) -> LocalBlobClient:
+        """Returns a client of the blob"""
+        return LocalBlobClient(
+            service=self._service, container_name=self.container_name, blob_name=blob
+        )
+
+    def download_blob(self, blob: str | BlobProperties) -> _Downloader:
+        """Downloads the blob"""
+        name = blob if isinstance(blob, str) else blob.name
+        return self.get_blob_client(name).download_blob()
+
+
+class LocalBlobClient:
+    """A local stand in for azure.storage.blob.BlobClient"""
+
+    def __init__(self, service: LocalBlobServiceClient, container_name: str, blob_name: str):
+        self._service = service
+        self.container_name = container_name
+        self.blob_name = blob_name
+
+    def _select(self, connection: sqlite3.Connection, columns: str) -> sqlite3.Row:
+        row = connection.execute(
+            f"SELECT {columns} FROM blobs WHERE container = ? AND name = ?",  # nosec
+            (self.container_name, self.blob_name),
+        ).fetchone()
+        if row is None:
+            raise ResourceNotFoundError(f"The blob {self.blob_name} does not exist")
+        return row
+
+    def get_blob_properties(self) -> BlobProperties:
+        """Returns the properties of the blob"""
+        self._service.wait()
+        with self._service.transaction() as connection:
+            return _to_properties(self._select(connection, _PROPERTIES))
+
+    def download_blob(self) -> _Downloader:
+        """Downloads the blob"""
+        self._service.wait()
+        with self._service.transaction() as connection:
+            row = self._select(connection, _PROPERTIES + ", data")
+        return _Downloader(data=row["data"], properties=_to_properties(row))
+
+    def upload_blob(
+        self,
+        data: bytes,
+        overwrite: bool = False,
+        content_settings: ContentSettings | None = None,
+        etag: str | None = None,
+        match_condition: MatchConditions | None = None,
+    ):
+        """Uploads the blob
+
+        Raises:
+            ResourceExistsError: If the blob exists and overwrite is False
+            ResourceModifiedError: If the match_condition IfNotModified is not met by the etag
+        """
+        self._service.wait()
+        settings = content_settings or ContentSettings()
+        with self._service.transaction() as connection:
+            # Locks the database such that the conditions cannot change before the write
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                current = self._select(connection, "etag")["etag"]
+            except ResourceNotFoundError:
+                current = None
+            if current is not None and not overwrite:
+                raise ResourceExistsError(f"The blob {self.blob_name} already exists")
+            if match_condition == MatchConditions.IfNotModified and current != etag:
+                raise ResourceModifiedError(f"The blob {self.blob_name} was modified")
+            connection.execute(
+                "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.container_name,
+                    self.blob_name,
+                    data,
+                    f'"{uuid.uuid4().hex}"',
+                    time.time(),
+                    len(data),
+                    settings.content_type,
+                    settings.content_encoding,
+                    settings.cache_control,
+                    bytes(settings.content_md5) if settings.content_md5 else None,
+                ),
+            )
+
+    def delete_blob(self, snapshot: str | None = None):  # pylint: disable=unused-argument
+        """Deletes the blob
+
+        Raises:
+            ResourceNotFoundError: If the blob does not exist
+        """
+        self._service.wait()
+        with self._service.transaction() as connection:
+            cursor = connection.execute(
+                "DELETE FROM blobs WHERE container = ? AND name = ?",
+                (self.container_name, self.blob_name),
+            )
+            if not cursor.rowcount:
+                raise ResourceNotFoundError(f"The blob {self.blob_name} does not exist")
+
+
+class LocalBlobHandler(RequestHandler):  # pylint: disable=abstract-method
+    """Serves the blobs of the local blob service like Azure serves the blobs and static website
+
+    The response has the content settings of the blob and an ETag. Thus the browser can revalidate
+    it and gets a 304 if not modified.
+    """
+
+    def initialize(self, service: LocalBlobServiceClient):  # pylint: disable=arguments-differ
+        """Sets the local blob service. Called by Tornado for every request"""
+        # pylint: disable=attribute-defined-outside-init
+        self.service = service
+
+    async def get(self, container: str, blob: str):  # pylint: disable=arguments-differ
+        """Returns the blob of the container"""
+        client = self.service.get_blob_client(container, blob)
+        try:
+            # The database and the latency must not block the server
+            downloader = await IOLoop.current().run_in_executor(None, client.download_blob)
+        except ResourceNotFoundError as ex:
+            raise HTTPError(404) from ex
+
+        settings = downloader.properties.content_settings
+        self.set_header("Content-Type", settings.content_type or "application/octet-stream")
+        if settings.content_encoding:
+            self.set_header("Content-Encoding", settings.content_encoding)
+        if settings.cache_control:
+            self.set_header("Cache-Control", settings.cache_control)
+        # Tornado adds the ETag and responds 304 Not Modified if it matches If-None-Match
+        self.write(downloader.readall())
+
+
+def get_routes(conn_str: str) -> List:
+    """Returns the routes serving the blobs. Use them as `extra_patterns` of pn.serve
+
+    Args:
+        conn_str: The connection string of the AzureBlobStorage. No routes if it is not local
+    """
+    if not is_local(conn_str):
+        return []
+    return [(ROUTE, LocalBlobHandler, {"service": create_local_service_client(conn_str)})]
@@ -0,0 +1,26 @@
+"""Functionality to read and replace the base target of the links in a build"""
+import re
+from pathlib import Path
+
+from panel_sharing import config
+from panel_sharing.shared.compression import precompress
+from panel_sharing.shared.transfer import write_text
+
+BASE_TARGET = re.compile("<base target='([^']*)' />")
+
+
+def get_base_target(app_html: str) -> str:
+    """Returns the base target of the links in the text of an app.html file"""
+    match = BASE_TARGET.search(app_html)
+    return match.group(1) if match else ""
+
+
+def set_base_target(app_html: Path, base_target: str):
+    """Replaces the base target of the links in the app.html file. '' removes it"""
+    text = BASE_TARGET.sub("", app_html.read_text(encoding="utf8"))
+    if base_target:
+        text = text.replace("<head>", f"<head><base target='{base_target}' />")
+    write_text(app_html, text)
+    if config.BUILD_PRECOMPRESS:
+        # A lower quality as this runs every time a build is shared or developed
+        precompress(app_html, quality=5)
@@ -0,0 +1,76 @@
+"""A persistent, content addressed cache of build folders"""
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+from panel_sharing import config
+from panel_sharing.shared.transfer import link_tree, remove_least_recently_used
+
+
+class BuildCache:
+    """A persistent, content addressed cache of build folders
+
+    The cache is shared across processes. Entries are written to a temporary folder first and
+    then renamed into place. Thus a reader never sees a partially written entry.
+
+    The files are linked instead of copied where possible. See `panel_sharing.shared.transfer`.
+
+    The least recently used entries are evicted when there are more than `max_entries`.
+
+    Args:
+        path: The folder of the cache
+        max_entries: The maximum number of builds to cache
+    """
+
+    def __init__(self, path: Path, max_entries: int = config.BUILD_CACHE_MAX_ENTRIES):
+        self._path = path.absolute()
+        self.max_entries = max_entries
+        if not self._path.exists():
+            self._path.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, key: str) -> Path:
+        return self._path / key
+
+    def __contains__(self, key: str) -> bool:
+        return self._entry_path(key).is_dir()
+
+    def get(self, key: str, path: Path) -> bool:
+        """Copies the cached build folder to path. Returns True if the key was found"""
+        entry = self._entry_path(key)
+        if not entry.is_dir():
+            return False
+        try:
+            link_tree(entry, path)
+            os.utime(entry)
+        except FileNotFoundError:
+            # Evicted while reading
+            shutil.rmtree(path, ignore_errors=True)
+            return False
+        return True
+
+    def put(self, key: str, path: Path):
+        """Stores a copy of the build folder at path in the cache"""
+        entry = self._entry_path(key)
+        if entry.is_dir():
+            return
+        tmp = self._path / f".tmp-{uuid.uuid4()}"
+        link_tree(path, tmp)
+        try:
+            tmp.rename(entry)
+        except OSError:
+            # Another process stored the same key first
+            shutil.rmtree(tmp, ignore_errors=True)
+        remove_least_recently_used(self._path, self.max_entries)
+
+    def __delitem__(self, key: str):
+        shutil.rmtree(self._entry_path(key))
+
+    def discard(self, key: str):
+        """Removes the entry if it exists"""
+        shutil.rmtree(self._entry_path(key), ignore_errors=True)
+
+    def clear(self):
+        """Removes all the entries"""
+        for entry in self._path.iterdir():
+            shutil.rmtree(entry, ignore_errors=True)
@@ -0,0 +1,82 @@
+"""Functionality to minify and precompress the files of a build
+
+Precompressed `.gz` and `.br` siblings can be served directly by a web server or uploaded with a
+`Content-Encoding`. The minifiers and brotli are optional. Install them via
+`pip install panel-sharing[performance]`.
+"""
+import gzip
+from pathlib import Path
+from typing import Dict
+
+from panel_sharing.shared.transfer import write_bytes, write_text
+
+try:
+    import brotli
+except ImportError:
+    brotli = None  # type: ignore
+
+try:
+    import minify_html
+except ImportError:
+    minify_html = None  # type: ignore
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None  # type: ignore
+
+COMPRESSIBLE_SUFFIXES = (".html", ".js", ".css", ".json")
+# The suffix of the precompressed file and its Content-Encoding
+ENCODINGS: Dict[str, str] = {".br": "br", ".gz": "gzip"}
+
+
+def minify(path: Path) -> bool:
+    """Minifies the html or js file in path if a minifier is installed
+
+    The opening <html> and <head> tags are kept as other steps of the build depend on them.
+
+    Returns:
+        True if the file was minified
+    """
+    if path.suffix == ".html" and minify_html:
+        text = minify_html.minify(  # pylint: disable=no-member
+            path.read_text(encoding="utf8"),
+            keep_closing_tags=True,
+            keep_html_and_head_opening_tags=True,
+            minify_css=True,
+        )
+    elif path.suffix == ".js" and rjsmin:
+        text = rjsmin.jsmin(path.read_text(encoding="utf8"))
+    else:
+        return False
+    write_text(path, text)
+    return True
+
+
+def precompress(path: Path, quality: int = 11):
+    """Writes the .gz and if brotli is installed the .br compressed siblings of the file
+
+    Args:
+        path: The file to compress
+        quality: The brotli quality from 0 to 11. 11 is the smallest but is also ~10 times slower
+            than 9.
+    """
+    data = path.read_bytes()
+    write_bytes(path.with_name(path.name + ".gz"), gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli:
+        write_bytes(path.with_name(path.name + ".br"), brotli.compress(data, quality=quality))
+
+
+def is_precompressed(path: Path) -> bool:
+    """Returns True if path is a precompressed sibling of another file"""
+    return path.suffix in ENCODINGS and path.with_suffix("").suffix in COMPRESSIBLE_SUFFIXES
+
+
+def optimize_tree(path: Path, minify_files: bool = True, precompress_files: bool = True):
+    """Minifies and/ or precompresses the compressible files in the folder path"""
+    for file in list(path.rglob("*")):
+        if file.is_file() and file.suffix in COMPRESSIBLE_SUFFIXES:
+            if minify_files:
+                minify(file)
+            if precompress_files:
+                precompress(file)
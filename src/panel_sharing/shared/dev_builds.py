@@ -0,0 +1,172 @@
+"""Serves the development builds from memory
+
+Development builds are usually viewed once and then replaced by the next build. The files of a
+build are written to the www folder of the development storage. The DevBuildHandler reads a build
+into a bounded in-memory LRU the first time it is served and serves the other files of the build
+from memory. Thus a build is found by every process sharing the www folder, and no memory is used
+if the www folder is served as static files, for example via
+`panel serve --static-dirs apps-dev=apps/dev/www`.
+
+Add the routes to the server via
+
+.. code-block:: python
+
+    pn.serve(apps, extra_patterns=get_routes("apps/dev/www"))
+"""
+from __future__ import annotations
+
+import mimetypes
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List
+
+from tornado.web import HTTPError, RequestHandler
+
+from panel_sharing import config
+from panel_sharing.shared.compression import ENCODINGS
+from panel_sharing.shared.transfer import read_files
+
+# The url of a file of a development build is apps-dev/<key>/<file>
+ROUTE = r"/apps-dev/([^/]+)/(.+)"
+
+
+def _get_size(files: Dict[str, bytes]) -> int:
+    return sum(len(data) for data in files.values())
+
+
+class DevBuilds:
+    """A bounded in-memory LRU of the files of the development builds
+
+    The builds are also on disk. The least recently served builds are dropped from memory when
+    the builds in memory use more than `max_size` bytes. A build larger than `max_size` is not
+    kept in memory.
+
+    Args:
+        max_size: The number of bytes the builds in memory may use. 0 disables the memory
+    """
+
+    def __init__(self, max_size: float = config.DEV_BUILDS_MEMORY_SIZE * 1e6):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._builds: OrderedDict[str, Dict[str, bytes]] = OrderedDict()
+        self._size = 0
+        self._stats = {"hits": 0, "misses": 0}
+
+    def put(self, key: str, build: Path) -> Dict[str, bytes] | None:
+        """Keeps the files of the build folder in memory
+
+        Args:
+            key: The key of the development build
+            build: The build folder. For example the folder of the build in the www folder
+
+        Returns:
+            The files of the build. None if the build is not kept in memory
+        """
+        files = read_files(build) if self.max_size else {}
+        size = _get_size(files)
+        with self._lock:
+            self._discard(key)
+            if not files or size > self.max_size:
+                return None
+            self._builds[key] = files
+            self._size += size
+            while self._size > self.max_size:
+                _, dropped = self._builds.popitem(last=False)
+                self._size -= _get_size(dropped)
+            return files
+
+    def get(self, key: str) -> Dict[str, bytes] | None:
+        """Returns the files of the build by their relative path. None if not in memory"""
+        with self._lock:
+            if key in self._builds:
+                self._builds.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._builds[key]
+            self._stats["misses"] += 1
+            return None
+
+    def _discard(self, key: str):
+        if key in self._builds:
+            self._size -= _get_size(self._builds.pop(key))
+
+    def discard(self, key: str):
+        """Removes the build from memory"""
+        with self._lock:
+            self._discard(key)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._builds
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number and bytes of the builds in memory and the hits and misses"""
+        with self._lock:
+            return {**self._stats, "builds": len(self._builds), "size": self._size}
+
+
+# The development builds of the process. The handler must serve the builds of the storages
+DEV_BUILDS = DevBuilds()
+
+
+class DevBuildHandler(RequestHandler):  # pylint: disable=abstract-method
+    """Serves the files of the development builds from memory. Falls back to the www folder
+
+    A build is read into memory the first time one of its files is served.
+
+    The precompressed `.br` or `.gz` sibling of a file is served if the browser accepts it. The
+    response has an ETag. Thus the browser can revalidate it and gets a 304 if not modified.
+    """
+
+    def initialize(  # pylint: disable=arguments-differ
+        self, path: str | Path, builds: DevBuilds | None = None
+    ):
+        """Sets the www folder and the builds. Called by Tornado for every request"""
+        # pylint: disable=attribute-defined-outside-init
+        self.path = Path(path).absolute()
+        self.builds = builds or DEV_BUILDS
+
+    def _read(self, files: Dict[str, bytes] | None, key: str, name: str) -> bytes | None:
+        if files is not None:
+            return files.get(name)
+        file = (self.path / key / name).resolve()
+        if self.path.resolve() not in file.parents or not file.is_file():
+            return None
+        return file.read_bytes()
+
+    def get(self, key: str, file: str):  # pylint: disable=arguments-differ
+        """Returns the file of the development build"""
+        files = self.builds.get(key)
+        build = (self.path / key).resolve()
+        if files is None and build.parent == self.path.resolve() and build.is_dir():
+            files = self.builds.put(key, build)
+        header = self.request.headers.get("Accept-Encoding", "")
+        accepted = {encoding.split(";")[0].strip() for encoding in header.split(",")}
+        data = None
+        for suffix, encoding in ENCODINGS.items():
+            if encoding in accepted:
+                data = self._read(files, key, file + suffix)
+                if data is not None:
+                    self.set_header("Content-Encoding", encoding)
+                    break
+        if data is None:
+            data = self._read(files, key, file)
+        if data is None:
+            raise HTTPError(404)
+
+        content_type, _ = mimetypes.guess_type(file)
+        self.set_header("Content-Type", content_type or "application/octet-stream")
+        self.set_header("Vary", "Accept-Encoding")
+        self.set_header("Cache-Control", "no-cache")
+        # Tornado adds the ETag and responds 304 Not Modified if it matches If-None-Match
+        self.write(data)
+
+
+def get_routes(path: str | Path = "apps/dev/www", builds: DevBuilds | None = None) -> List:
+    """Returns the routes serving the development builds. Use them as `extra_patterns` of pn.serve
+
+    Args:
+        path: The www folder of the development storage. Builds not in memory are served from it
+        builds: The DevBuilds. Defaults to DEV_BUILDS
+    """
+    return [(ROUTE, DevBuildHandler, {"path": path, "builds": builds or DEV_BUILDS})]
@@ -0,0 +1,160 @@
+"""A garbage collector of temporary apps like the development builds"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from panel_sharing import config
+from panel_sharing.shared.app_index import AppIndex
+
+logger = logging.getLogger("panel_sharing.garbage_collector")
+
+
+class GarbageCollector:
+    """Deletes the temporary apps of an AppIndex that are no longer in use
+
+    Sessions `acquire` the apps they show and `release` them when they show another app or are
+    destroyed. Every `interval` seconds the collector deletes
+
+    - the apps released more than `grace` seconds ago and not acquired again.
+    - the apps updated more than `ttl` seconds ago.
+    - the least recently updated apps while the apps use more than `max_size` bytes.
+
+    Acquired apps are never deleted. The references are only known to the current process. Thus
+    apps of other processes sharing the same folder are only deleted by the ttl and max_size.
+
+    Args:
+        index: The index of the apps
+        delete: A function deleting the app of a key
+        ttl: The number of seconds after which an app is deleted
+        max_size: The number of bytes the apps may use
+        grace: The number of seconds a released app is kept. For example while a user logs in
+        interval: The number of seconds between two collections
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        index: AppIndex,
+        delete: Callable[[str], None],
+        *,
+        ttl: float = config.DEV_BUILDS_TTL,
+        max_size: float = config.DEV_BUILDS_MAX_SIZE * 1e6,
+        grace: float = config.DEV_BUILDS_GRACE,
+        interval: float = config.DEV_BUILDS_GC_INTERVAL,
+    ):
+        self._index = index
+        self._delete = delete
+        self.ttl = ttl
+        self.max_size = max_size
+        self.grace = grace
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._references: Dict[str, int] = {}
+        self._released: Dict[str, float] = {}
+        self._thread: threading.Thread | None = None
+        self._stats = {"size": 0, "apps": 0, "released": 0, "expired": 0, "evicted": 0}
+
+    def acquire(self, key: str):
+        """Marks the app as in use. Starts the collector thread if not started"""
+        with self._lock:
+            self._references[key] = self._references.get(key, 0) + 1
+            self._released.pop(key, None)
+            if not self._thread:
+                self._thread = threading.Thread(
+                    target=self._run, name="panel_sharing_garbage_collector", daemon=True
+                )
+                self._thread.start()
+
+    def replace(self, old: str, new: str):
+        """Releases the old app and acquires the new app. Empty keys are ignored"""
+        if new:
+            self.acquire(new)
+        if old:
+            self.release(old)
+
+    def release(self, key: str):
+        """Marks the app as no longer in use by one of its users"""
+        with self._lock:
+            count = self._references.get(key, 0) - 1
+            if count > 0:
+                self._references[key] = count
+            elif key in self._references:
+                del self._references[key]
+                self._released[key] = time.time()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the size in bytes and number of the apps and the counts of deleted apps
+
+        The counts are the apps deleted after being released, after the ttl and to stay below
+        the max_size.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.collect()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Failed to collect the garbage")
+
+    def _remove(self, key: str, reason: str) -> bool:
+        """Deletes the app unless it is in use. Returns True if it was deleted"""
+        # The lock is held until the app is deleted. Thus a session cannot acquire it in between
+        with self._lock:
+            if key in self._references:
+                return False
+            try:
+                self._delete(key)
+            except KeyError:
+                # Deleted by another process
+                pass
+            self._released.pop(key, None)
+            self._stats[reason] += 1
+        logger.info("Deleted %s app %s", reason, key)
+        return True
+
+    def collect(self):
+        """Deletes the apps no longer in use"""
+        now = time.time()
+        with self._lock:
+            released = [key for key, time_ in self._released.items() if now - time_ >= self.grace]
+        for key in released:
+            self._remove(key, "released")
+
+        apps: List[Dict] = []
+        for app in self._index.values():
+            expired = now - app["updated"] >= self.ttl
+            if not (expired and self._remove(app["key"], "expired")):
+                apps.append(app)
+
+        size = sum(app["size"] for app in apps)
+        kept = []
+        # The values are sorted by the updated time. The least recently updated are evicted first
+        for app in apps:
+            if size > self.max_size and self._remove(app["key"], "evicted"):
+                size -= app["size"]
+            else:
+                kept.append(app)
+        with self._lock:
+            self._stats["size"] = size
+            self._stats["apps"] = len(kept)
+
+
+_COLLECTORS: Dict[Path, GarbageCollector] = {}
+_COLLECTORS_LOCK = threading.Lock()
+
+
+def get_garbage_collector(index: AppIndex, delete: Callable[[str], None]) -> GarbageCollector:
+    """Returns the GarbageCollector of the index shared by the whole process
+
+    The references of all the sessions of the process must be known to a single collector.
+    """
+    with _COLLECTORS_LOCK:
+        if index.path not in _COLLECTORS:
+            _COLLECTORS[index.path] = GarbageCollector(index=index, delete=delete)
+        return _COLLECTORS[index.path]
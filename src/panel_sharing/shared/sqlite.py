@@ -0,0 +1,40 @@
+"""Functionality to share a SQLite database between threads and processes
+
+Every transaction uses its own connection. Thus a connection is never shared between threads. The
+database uses write-ahead logging such that readers do not block the writer.
+"""
+from __future__ import annotations
+
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+# The number of seconds to wait for the lock of another writer
+TIMEOUT = 30
+
+
+@contextmanager
+def transaction(path: Path) -> Iterator[sqlite3.Connection]:
+    """Returns a new connection to the database. Commits when the context exits
+
+    The rows are returned as sqlite3.Row. The transaction is rolled back if an error is raised.
+    """
+    connection = sqlite3.connect(path, timeout=TIMEOUT)
+    connection.row_factory = sqlite3.Row
+    try:
+        with connection:
+            yield connection
+    finally:
+        connection.close()
+
+
+def create(path: Path, schema: str):
+    """Creates the database and the tables of the schema if they do not exist yet
+
+    Enables write-ahead logging. It is a property of the database file and persists.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with transaction(path) as connection:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(schema)
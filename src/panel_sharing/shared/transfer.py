@@ -0,0 +1,117 @@
+"""Functionality to copy and move files without copying their data where possible
+
+Files are hard linked, or reflinked where the file system supports it. They are only copied
+across devices. As a consequence a file may be shared by several folders. Thus files must never
+be modified in place. Use `write_text` to replace them instead.
+"""
+import os
+import shutil
+import sys
+import uuid
+from pathlib import Path
+from typing import Dict
+
+# The Linux ioctl request code used to clone a file. See `man ioctl_ficlone`
+FICLONE = 0x40049409
+
+
+def _reflink(src: str, dst: str) -> bool:
+    """Returns True if dst was created as a reflink (copy on write clone) of src"""
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl  # pylint: disable=import-outside-toplevel
+
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        try:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+            cloned = True
+        except OSError:
+            cloned = False
+    if not cloned:
+        os.unlink(dst)
+    return cloned
+
+
+def link_file(src: str, dst: str) -> str:
+    """Hard links, reflinks or as a last resort copies the file src to dst
+
+    Can be used as the copy_function of `shutil.copytree`.
+    """
+    if os.path.lexists(dst):
+        os.unlink(dst)
+    try:
+        os.link(src, dst)
+        return dst
+    except OSError:
+        pass
+    if _reflink(src, dst):
+        shutil.copystat(src, dst)
+        return dst
+    return shutil.copy2(src, dst)
+
+
+def link_tree(src: Path, dst: Path):
+    """Like shutil.copytree(src, dst, dirs_exist_ok=True) but links the files where possible"""
+    shutil.copytree(src, dst, copy_function=link_file, dirs_exist_ok=True)
+
+
+def replace_tree(src: Path, dst: Path):
+    """Moves the folder src to dst. Replaces dst if it exists.
+
+    The folder is renamed. It is only copied if src and dst are on different devices.
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    trash = None
+    if dst.exists():
+        trash = dst.with_name(f".{dst.name}.{uuid.uuid4().hex}")
+        os.replace(dst, trash)
+    try:
+        os.replace(src, dst)
+    except OSError:
+        # src and dst are on different devices
+        shutil.copytree(src, dst)
+        shutil.rmtree(src)
+    if trash:
+        shutil.rmtree(trash, ignore_errors=True)
+
+
+def write_bytes(path: Path, data: bytes):
+    """Writes the data to path by replacing the file. Other links to the file are not modified"""
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def write_text(path: Path, text: str):
+    """Writes the text to path by replacing the file. Other links to the file are not modified"""
+    write_bytes(path, text.encode("utf8"))
+
+
+def read_files(path: Path) -> Dict[str, bytes]:
+    """Returns the content of the files in the folder by their relative posix path"""
+    return {
+        file.relative_to(path).as_posix(): file.read_bytes()
+        for file in path.rglob("*")
+        if file.is_file()
+    }
+
+
+def _get_mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        # Removed by another process
+        return 0.0
+
+
+def remove_least_recently_used(path: Path, max_entries: int):
+    """Removes the least recently modified folders in path in excess of max_entries
+
+    Folders starting with '.', for example temporary folders, are ignored.
+    """
+    entries = [entry for entry in path.iterdir() if not entry.name.startswith(".")]
+    if len(entries) <= max_entries:
+        return
+    entries.sort(key=_get_mtime)
+    for entry in entries[: len(entries) - max_entries]:
+        shutil.rmtree(entry, ignore_errors=True)
@@ -2,12 +2,15 @@
 from __future__ import annotations
 
 import logging
+from functools import partial
 from pathlib import Path
 
 import panel as pn
 from diskcache import Cache
 
 from panel_sharing import components
+from panel_sharing.caching import CachingStorage
+from panel_sharing.components.gallery import read_examples
 from panel_sharing.models import AppState, AzureBlobStorage, Project, Site
 from panel_sharing.utils import (
     exception_handler,
@@ -35,21 +38,20 @@ cache = Cache(".cache/panel_sharing")
 
 @pn.cache
 def get_examples(examples: str):
-    """Returns a list of example Projects"""
-    # pylint: disable=protected-access
-    return list(components.Gallery.read(Path(examples))._examples_map.values())
+    """Returns a list of the Examples. Their Projects are read on first use"""
+    return read_examples(Path(examples))
 
 
-def _set_start_project(state, set_example, gallery):
+async def _set_start_project(state, set_example, gallery):
     key = get_app_key()
     project = get_project_key()
     example = get_example_key()
     if key:
         try:
-            state.set_dev_project_from_shared_app(key)
+            await state.aset_dev_project_from_shared_app(key)
         except:  # pylint: disable=bare-except
             notify_app_key_not_found("app", key)
-            set_example(project=gallery.value)
+            await set_example(project=gallery.value)
             pn.state.location.search = ""
     elif project:
         try:
@@ -58,17 +60,17 @@ def _set_start_project(state, set_example, gallery):
             state.project.source.requirements = project_.source.requirements
             state.project.source.readme = project_.source.readme
             state.project.source.thumbnail = project_.source.thumbnail
-            pn.state.onload(state.build)
+            await state.abuild()
         except:  # pylint: disable=bare-except
             notify_app_key_not_found("project", key)
-            set_example(project=gallery.value)
+            await set_example(project=gallery.value)
             pn.state.location.search = ""
     else:
         try:
-            set_example(project=gallery.get(example))
+            await set_example(project=gallery.get(example))
         except:  # pylint: disable=bare-except
             notify_app_key_not_found("example", key)
-            set_example(project=gallery.value)
+            await set_example(project=gallery.value)
             pn.state.location.search = ""
 
 
@@ -85,21 +87,24 @@ def create():
         "ace", sizing_mode="stretch_width", notifications=True, exception_handler=exception_handler
     )
 
-    site = Site(production_storage=AzureBlobStorage())
+    site = Site(production_storage=CachingStorage(storage=AzureBlobStorage()))
     state = AppState(site=site)
+    if pn.state.curdoc:
+        # Releases the development build such that it can be garbage collected
+        pn.state.on_session_destroyed(lambda session_context: state.close())
 
     gallery = components.Gallery(examples=get_examples(str(state.examples.absolute())))
 
     @pn.depends(gallery.param.value, watch=True)
-    def set_example(project):
-        project.build()
-        state.copy(project)
+    async def set_example(project):
+        await state.acopy(project)
         if pn.state.location:
             logger.info("set_example: updating location")
             pn.state.location.search = ""
             pn.state.location.update_query(example=project.name)
 
-    _set_start_project(state, set_example, gallery)
+    # The start project is copied or built without blocking the event loop once the page is loaded
+    pn.state.onload(partial(_set_start_project, state, set_example, gallery))
 
     project_builder = components.ProjectBuilder(state=state)
     source_editor = components.SourceEditor(source=state.project.source)
@@ -139,12 +144,16 @@ and report issues at <fast-anchor href="https://github.com/awesome-panel/panel-s
         cache[state] = {
             "source": app_state.project.source.to_dict(),
             "key": app_state.development_key,
+            "url": app_state.development_url,
         }
 
     oauth_state = authentication.get_state_from_session_args()
     if oauth_state and oauth_state in cache:
         state.project.source.param.update(**cache[oauth_state]["source"])
         state._set_development(cache[oauth_state]["key"])  # pylint: disable=protected-access
+        if not state.development_key:
+            # The published build of an example
+            state.development_url = cache[oauth_state].get("url", "")
 
     template = pn.template.FastGridTemplate(
         site=state.site.name,
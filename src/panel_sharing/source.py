@@ -0,0 +1,61 @@
+"""The source files of a Project"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict
+
+import param
+
+from panel_sharing import config
+from panel_sharing.shared.transfer import write_text
+
+
+class Source(param.Parameterized):
+    """Represent the source files"""
+
+    name = param.String(config.REPOSITORY_NAME, constant=True)
+    code = param.String(config.CODE)
+    readme = param.String(config.README)
+    thumbnail = param.String(config.THUMBNAIL)
+    requirements = param.String(config.REQUIREMENTS)
+
+    def _items(self):
+        """Returns the list of filename: text value"""
+        return {
+            "app.py": self.code,
+            "readme.md": self.readme,
+            "thumbnail.png": self.thumbnail,
+            "requirements.txt": self.requirements,
+        }.items()
+
+    def save(self, path: Path | None = None):
+        """Saves the source files to the path. Defaults to the current working directory
+
+        Files that have not changed are not written again.
+        """
+        path = Path(path or "")
+        path.mkdir(parents=True, exist_ok=True)
+        for file_path, text in self._items():
+            file = path / file_path
+            if file.exists() and file.read_text(encoding="utf8") == text:
+                continue
+            write_text(file, text)
+
+    @classmethod
+    def read(cls, path: Path | None = None) -> "Source":
+        """Reads the Source from the path. Defaults to the current working directory"""
+        path = Path(path or "")
+        source = cls(name="new")
+        source.code = (path / "app.py").read_text(encoding="utf8")
+        source.readme = (path / "readme.md").read_text(encoding="utf8")
+        source.requirements = (path / "requirements.txt").read_text(encoding="utf8")
+        return source
+
+    def to_dict(self) -> Dict:
+        """Returns the source as a dict"""
+        return {
+            "code": self.code,
+            "readme": self.readme,
+            # "thumbnail": self.thumbnail,
+            "requirements": self.requirements,
+        }
@@ -1,6 +1,7 @@
 """A module of shared utilities"""
 import logging
 import os
+import threading
 import time
 import urllib.parse as urlparse
 from contextlib import ContextDecorator, contextmanager
@@ -16,6 +17,9 @@ DEFAULT_APP = ""
 EXAMPLE_KEY_PARAMETER = "example"
 DEFAULT_EXAMPLE = "Welcome"
 
+# The cwd is process global. Only one thread at a time may change it.
+_CWD_LOCK = threading.RLock()
+
 
 @contextmanager
 def set_directory(path: Path):
@@ -27,14 +31,14 @@ def set_directory(path: Path):
     Yields:
         None
     """
-
-    origin = Path().absolute()
-    try:
-        path.mkdir(parents=True, exist_ok=True)
-        os.chdir(path)
-        yield
-    finally:
-        os.chdir(origin)
+    with _CWD_LOCK:
+        origin = Path().absolute()
+        try:
+            path.mkdir(parents=True, exist_ok=True)
+            os.chdir(path)
+            yield
+        finally:
+            os.chdir(origin)
 
 
 def exception_handler(ex):
@@ -79,7 +83,10 @@ def notify_app_key_not_found(app_or_example, key: str):
     def on_load():
         pn.state.notifications.error(notification)
 
-    pn.state.onload(on_load)
+    if pn.state.loaded:
+        on_load()
+    else:
+        pn.state.onload(on_load)
 
 
 class TimerError(Exception):
@@ -1,17 +1,34 @@
 import time
 from pathlib import Path
 
-from panel_sharing.components.gallery import _read_projects
+from panel_sharing.components.gallery import Gallery, read_examples
+from panel_sharing.models import Project
 
 EXAMPLES_PATH = Path(__file__).parent.parent.parent / "src/panel_sharing/examples"
 
 
-def test_read_projects():
-    projects = _read_projects(path=EXAMPLES_PATH)
-    assert projects
+def test_read_examples(tmpdir):
+    examples = read_examples(path=EXAMPLES_PATH)
+    assert examples
+    # The builds in the repo may be of other versions. Then they are built again
+    for example in examples:
+        example.project.build(Path(tmpdir) / example.path.name)
+    projects = [Project.read(Path(tmpdir) / example.path.name) for example in examples]
     start = time.perf_counter()
     for project in projects:
-        project.build()
+        project.build(Path(tmpdir) / "build")
     end = time.perf_counter()
     duration = end - start
     assert duration < 0.5
+
+
+def test_examples_are_read_on_first_use():
+    examples = read_examples(path=EXAMPLES_PATH)
+    assert all(example._project is None for example in examples)
+    assert len({example.digest for example in examples}) == len(examples)
+
+    gallery = Gallery(examples=examples)
+
+    assert gallery.value.name == "Welcome"
+    assert [example.name for example in examples if example._project] == ["Welcome"]
+    assert gallery.get("Basic App") is gallery.get("Basic App")
@@ -0,0 +1,52 @@
+"""We can index the apps saved in a folder"""
+from pathlib import Path
+
+import pytest
+
+from panel_sharing.models import Project, Source
+from panel_sharing.shared.app_index import AppIndex
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def root(tmpdir):
+    """Returns a folder with three saved apps"""
+    root = Path(tmpdir) / "projects"
+    for key in ["alice/app", "alice/other-app", "bob/app"]:
+        Project(source=Source(code="import panel")).save(root / key)
+    return root
+
+
+def test_index_existing_apps(root):
+    """The apps already in the root folder are indexed when the index is created"""
+    index = AppIndex(root.parent / "index.db", root=root)
+
+    assert index.keys() == ["alice/app", "alice/other-app", "bob/app"]
+    assert len(index) == 3
+
+
+def test_query(root):
+    """We can query the keys by prefix and user"""
+    index = AppIndex(root.parent / "index.db", root=root)
+
+    assert index.keys(prefix="alice/o") == ["alice/other-app"]
+    assert index.keys(user="bob") == ["bob/app"]
+    assert not index.keys(prefix="carl/")
+
+
+def test_upsert_and_delete(root):
+    """The metadata is updated and the created timestamp is kept"""
+    index = AppIndex(root.parent / "index.db", root=root)
+    created = index.get("bob/app")["created"]
+    (root / "bob/app/source/app.py").write_text("import panel as pn", encoding="utf8")
+
+    index.upsert("bob/app", root / "bob/app")
+
+    metadata = index.get("bob/app")
+    assert metadata["user"] == "bob"
+    assert metadata["created"] == created
+    assert metadata["updated"] >= created
+    assert index.delete("bob/app")
+    assert not index.delete("bob/app")
+    assert index.get("bob/app") is None
@@ -0,0 +1,143 @@
+"""We can work with the AppState"""
+import asyncio
+import threading
+import time
+import uuid
+
+from panel_sharing import building
+from panel_sharing.models import (
+    DONE,
+    PENDING,
+    RUNNING,
+    AppState,
+    FileStorage,
+    Project,
+    Site,
+    Source,
+    TmpFileStorage,
+)
+
+
+def test_abuild(tmpdir):
+    """We can build without blocking the event loop and follow the build status"""
+    site = Site(development_storage=TmpFileStorage(path=str(tmpdir), base_target="_blank"))
+    state = AppState(site=site)
+    statuses = []
+    state.param.watch(lambda event: statuses.append(event.new), "build_status")
+
+    asyncio.run(state.abuild())
+
+    assert statuses == [PENDING, RUNNING, DONE]
+    assert state.development_key
+    assert state.development_url == f"apps-dev/{state.development_key}/app.html"
+    # The build is written to disk. It is only read into memory when it is served
+    assert state.development_key not in site.development_storage.dev_builds
+    assert (tmpdir / "www" / state.development_key / "app.html").exists()
+
+
+def test_close_releases_development_build(tmpdir):
+    """The development builds are released when replaced and when the session is closed"""
+    storage = TmpFileStorage(path=str(tmpdir), base_target="_blank")
+    storage.collector.grace = 0
+    state = AppState(site=Site(development_storage=storage))
+    state.build()
+    first = state.development_key
+    state.build()
+
+    storage.collector.collect()
+
+    assert storage.keys() == [state.development_key]
+    assert first != state.development_key
+
+    state.close()
+    storage.collector.collect()
+
+    assert not storage.keys()
+    assert state.project._tmpdir is None  # pylint: disable=protected-access
+
+
+def test_copy_shows_published_example(tmpdir):
+    """The sessions share the published build of an example until they build the project"""
+    site = Site(
+        development_storage=TmpFileStorage(path=str(tmpdir / "dev")),
+        examples_storage=FileStorage(path=str(tmpdir / "examples")),
+        examples_url="apps-examples",
+    )
+    example = Project(source=Source(code="import panel as pn\npn.panel('Hello').servable()"))
+    first = AppState(site=site)
+    second = AppState(site=site)
+
+    first.copy(example)
+    second.copy(example)
+
+    key = site.examples_storage.keys()[0]
+    assert site.examples_storage.keys() == [key]
+    assert first.development_url == second.development_url == f"apps-examples/{key}/app.html"
+    assert (tmpdir / "examples" / "www" / key / "app.html").exists()
+    assert not first.development_key
+    assert not site.development_storage.keys()
+
+    first.project.source.code += "\n"
+    first.build()
+
+    assert first.development_url == f"apps-dev/{first.development_key}/app.html"
+    assert site.examples_storage.keys() == [key]
+
+
+def test_copy_without_examples_url(tmpdir):
+    """The example is copied to the development storage if the published examples are not served"""
+    site = Site(
+        development_storage=TmpFileStorage(path=str(tmpdir / "dev")),
+        examples_storage=FileStorage(path=str(tmpdir / "examples")),
+        examples_url="",
+    )
+    state = AppState(site=site)
+
+    state.copy(Project(source=Source(code="import panel as pn\npn.panel('Hello').servable()")))
+
+    assert state.development_url == f"apps-dev/{state.development_key}/app.html"
+    assert site.development_storage.keys() == [state.development_key]
+    assert not site.examples_storage.keys()
+
+
+def test_copy_while_building(tmpdir, monkeypatch):
+    """A copy waits for the running build. The build of the replaced project is not shown"""
+    site = Site(
+        development_storage=TmpFileStorage(path=str(tmpdir / "dev")),
+        examples_storage=FileStorage(path=str(tmpdir / "examples")),
+        examples_url="",
+    )
+    state = AppState(site=site)
+    state.project.source.code = f"import panel as pn\npn.panel('{uuid.uuid4()}').servable()"
+    example = Project(
+        source=Source(code=f"import panel as pn\npn.panel('{uuid.uuid4()}').servable()")
+    )
+    started = threading.Event()
+    converted = []
+    convert = building.CONVERTER_POOL.convert
+
+    def slow(*args, **kwargs):
+        # Only the build of the replaced project is slow
+        build = not started.is_set()
+        if build:
+            started.set()
+            time.sleep(1)
+        error = convert(*args, **kwargs)
+        converted.append("build" if build else "copy")
+        return error
+
+    monkeypatch.setattr(building.CONVERTER_POOL, "convert", slow)
+
+    async def build_and_copy():
+        build = asyncio.create_task(state.abuild())
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        await state.acopy(example)
+        await build
+
+    asyncio.run(build_and_copy())
+
+    assert converted == ["build", "copy"]
+    assert state.project == example
+    assert state.development_url == f"apps-dev/{state.development_key}/app.html"
+    app_js = tmpdir / "dev" / "www" / state.development_key / "app.js"
+    assert example.source.code.splitlines()[1] in app_js.read_text(encoding="utf8")
@@ -1,16 +1,30 @@
 """Can can do CRUD operations for a project in Azure Blob Storage"""
+import threading
+import time
+from functools import partial
+from pathlib import Path
+from types import SimpleNamespace
 from urllib.error import HTTPError
 from urllib.request import urlopen
 
 import pytest
+from azure.core.exceptions import ResourceModifiedError, ResourceNotFoundError
 
+from panel_sharing import models
 from panel_sharing.models import AppState, AzureBlobStorage, Project, Site, Source
+from panel_sharing.shared.azure import blob
+from panel_sharing.shared.azure.blob import BlobIndex
 
 # pylint: disable=redefined-outer-name,protected-access
 
 PROJECT_CONTAINER_NAME = "test-project"
 WEB_CONTAINER_NAME = "test-web"
 WEB_URL = "https://awesomepanelsharing.blob.core.windows.net/test-web/"
+# A connection string for tests that do not connect to Azure
+CONN_STR = (
+    "DefaultEndpointsProtocol=https;AccountName=test;AccountKey=dGVzdA==;"
+    "EndpointSuffix=core.windows.net"
+)
 
 
 @pytest.fixture
@@ -79,6 +93,23 @@ def test_get_container_name(file, container_name, azure_blob_storage):
     assert azure_blob_storage._get_container_name(file) == container_name
 
 
+@pytest.mark.parametrize(
+    ["file", "content_encoding", "content_type"],
+    (
+        ("build/app.html", "gzip", "text/html"),
+        ("build/app.js", "gzip", "javascript"),
+        ("source/app.py", "", "text/x-python"),
+    ),
+)
+def test_get_content_settings(file, content_encoding, content_type):
+    """We can get the content settings of a file to upload"""
+    storage = AzureBlobStorage(conn_str=CONN_STR)
+    content_settings = storage._get_content_settings(Path(file), content_encoding)
+    assert content_type in content_settings.content_type
+    assert content_settings.content_encoding == (content_encoding or None)
+    assert content_settings.cache_control
+
+
 def test_set_and_get(key: str, azure_blob_storage: AzureBlobStorage, project: Project):
     """We can set and get a project"""
     azure_blob_storage[key] = project
@@ -123,3 +154,202 @@ def test_set_dev_project_from_shared_app(key: str, state: AppState, project: Pro
     assert state.development_key
     # Clean Up
     state.site.production_storage.delete(key)
+
+
+class FakeContainerClient:
+    """A fake Azure container client that keeps the blobs in memory"""
+
+    def __init__(self, container_name):
+        self.container_name = container_name
+        self.blobs = {}
+        self.uploads = []
+        self.threads = set()
+        self.lock = threading.Lock()
+
+    def list_blobs(self, name_starts_with):
+        """Returns the properties of the blobs"""
+        return [
+            SimpleNamespace(name=name, content_settings=content_settings)
+            for name, (_, content_settings) in self.blobs.items()
+            if name.startswith(name_starts_with)
+        ]
+
+    def download_blob(self, blob):
+        """Returns a downloader of the blob"""
+        self.threads.add(threading.current_thread().name)
+        time.sleep(0.05)
+        return SimpleNamespace(readall=lambda: self.blobs[blob][0])
+
+    def upload_blob(self, name, data, overwrite, content_settings):
+        """Stores the blob"""
+        assert overwrite
+        self.threads.add(threading.current_thread().name)
+        time.sleep(0.05)
+        with self.lock:
+            self.blobs[name] = (data, content_settings)
+            self.uploads.append(name)
+
+
+class FakeBlobClient:
+    """A fake Azure blob client that keeps a single blob in memory and supports etags"""
+
+    def __init__(self):
+        self.data = None
+        self.etag = 0
+
+    def download_blob(self):
+        """Returns a downloader of the blob"""
+        if self.data is None:
+            raise ResourceNotFoundError("The blob does not exist")
+        data = self.data
+        return SimpleNamespace(readall=lambda: data, properties=SimpleNamespace(etag=self.etag))
+
+    def upload_blob(self, data, overwrite, etag=None, match_condition=None):
+        """Stores the blob if etag matches"""
+        assert overwrite
+        if match_condition and etag != self.etag:
+            raise ResourceModifiedError("The blob was modified")
+        self.data = data
+        self.etag += 1
+
+
+@pytest.fixture()
+def fake_storage(monkeypatch):
+    """Returns an AzureBlobStorage with fake containers and CDN"""
+    storage = AzureBlobStorage(conn_str=CONN_STR, concurrency=4)
+    containers = {
+        storage.project_container_name: FakeContainerClient(storage.project_container_name),
+        storage.web_container_name: FakeContainerClient(storage.web_container_name),
+    }
+    monkeypatch.setattr(
+        storage, "project_container_client", containers[storage.project_container_name]
+    )
+    monkeypatch.setattr(storage, "web_container_client", containers[storage.web_container_name])
+
+    def _get_blob_client(key, file):
+        container = containers[storage._get_container_name(file)]
+        blob = storage._get_blob(key, file)
+        return SimpleNamespace(upload_blob=partial(container.upload_blob, blob))
+
+    monkeypatch.setattr(storage, "_get_blob_client", _get_blob_client)
+    monkeypatch.setattr(storage, "_index", BlobIndex(FakeBlobClient()))
+    monkeypatch.setattr(
+        blob,
+        "list_keys",
+        lambda container: sorted({"/".join(name.split("/")[:2]) for name in container.blobs}),
+    )
+    storage.purged = []
+
+    def purge(content_paths):
+        storage.purged.append(content_paths)
+
+    monkeypatch.setattr(models.AZURE_CDN, "purge", purge)
+    return storage
+
+
+def test_upload_concurrently(key, project, fake_storage):
+    """The files of a project are uploaded concurrently"""
+    fake_storage[key] = project
+
+    uploads = fake_storage.project_container_client.uploads
+    uploads += fake_storage.web_container_client.uploads
+    assert len(uploads) == len(project.files)
+    assert len(fake_storage.project_container_client.threads) > 1
+    assert len(fake_storage.purged) == 1
+    assert sorted(fake_storage.purged[0]) == [
+        f"/{key}/{file}" for file in ["app.html", "app.js", "config.json"]
+    ]
+
+
+def test_upload_changed_files_only(key, project, fake_storage):
+    """Only the changed files are uploaded and purged again"""
+    fake_storage[key] = project
+    fake_storage.project_container_client.uploads.clear()
+    fake_storage.web_container_client.uploads.clear()
+    fake_storage.purged.clear()
+
+    project.source.readme = "A new readme"
+    fake_storage[key] = project
+
+    assert fake_storage.project_container_client.uploads == [f"{key}/source/readme.md"]
+    assert not fake_storage.web_container_client.uploads
+    assert not fake_storage.purged
+
+
+def test_download_concurrently(key, project, fake_storage):
+    """The files of a project are downloaded concurrently into memory"""
+    fake_storage[key] = project
+    fake_storage.project_container_client.threads.clear()
+
+    assert fake_storage[key] == project
+    assert len(fake_storage.project_container_client.threads) > 1
+
+
+def test_get_keys_from_index(key, project, fake_storage):
+    """The keys are read from the index. It is rebuilt from a listing the first time"""
+    fake_storage[key] = project
+    assert fake_storage._index.read() == (None, None)
+
+    assert fake_storage.get_keys() == [key]
+    assert fake_storage._index.read()[0] == {key: {}}
+
+    fake_storage["user/other-app"] = project
+    assert fake_storage.get_keys() == [key, "user/other-app"]
+    assert fake_storage._index.read()[0]["user/other-app"]["updated"]
+
+
+def test_rebuild_index(key, project, fake_storage):
+    """The index can be repaired from a full listing"""
+    fake_storage[key] = project
+    fake_storage._index.write({"user/deleted-app": {}})
+
+    assert fake_storage.rebuild_index() == {key: {}}
+    assert fake_storage.get_keys() == [key]
+
+
+def test_share_despite_index_conflicts(key, project, fake_storage, monkeypatch):
+    """A share succeeds if the index cannot be updated. The index can be repaired later"""
+
+    def update(**kwargs):
+        raise ResourceModifiedError("The blob was modified")
+
+    monkeypatch.setattr(fake_storage._index, "update", update)
+    fake_storage[key] = project
+
+    assert fake_storage.project_container_client.uploads
+    assert fake_storage.rebuild_index() == {key: {}}
+
+
+def test_index_update_retries_concurrent_modifications():
+    """An update is retried if the index was modified concurrently"""
+    blob_client = FakeBlobClient()
+    index = BlobIndex(blob_client)
+    index.write({"a/1": {}, "b/2": {}})
+    read = index.read
+
+    def read_and_modify():
+        keys, etag = read()
+        if blob_client.etag == 1:
+            BlobIndex(blob_client).update(upsert={"c/3": {}})
+        return keys, etag
+
+    index.read = read_and_modify
+    index.update(upsert={"d/4": {}}, remove=["a/1"])
+
+    assert sorted(read()[0]) == ["b/2", "c/3", "d/4"]
+
+
+def test_index_update_without_index():
+    """An update does not create the index. It would hide the existing keys"""
+    index = BlobIndex(FakeBlobClient())
+    index.update(upsert={"a/1": {}})
+    assert index.read() == (None, None)
+
+
+def test_share_service_client():
+    """Storages of the same connection string share the client and its connection pool"""
+    storage = AzureBlobStorage(conn_str=CONN_STR)
+    other = AzureBlobStorage(conn_str=CONN_STR, web_container_name=WEB_CONTAINER_NAME)
+
+    assert storage.service_client is other.service_client
+    assert storage._executor is other._executor
@@ -0,0 +1,51 @@
+"""We can purge paths from the Azure CDN in batches"""
+import pytest
+
+from panel_sharing.shared.azure.cdn import AzureCDN
+
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture
+def cdn(monkeypatch):
+    """Returns an AzureCDN that records the purge requests instead of sending them"""
+    cdn = AzureCDN(window=0.1, max_content_paths=2)
+    cdn.purged = []
+    monkeypatch.setattr(cdn, "_purge_core", cdn.purged.append)
+    return cdn
+
+
+def test_purge_coalesces_paths(cdn):
+    """Paths queued within the window are purged together in batches of max_content_paths"""
+    first = cdn.purge(content_paths=["/a/app.html", "/a/app.js"])
+    second = cdn.purge(content_paths=["/a/app.js", "/b/app.html"])
+
+    first.result(timeout=5)
+    second.result(timeout=5)
+
+    assert cdn.purged == [["/a/app.html", "/a/app.js"], ["/b/app.html"]]
+    assert cdn.stats() == {
+        "paths": 4,
+        "purged_paths": 3,
+        "purges": 2,
+        "failures": 0,
+        "pending": 0,
+    }
+
+
+def test_purge_failure(cdn, monkeypatch):
+    """A failed purge is raised by the futures of its paths"""
+
+    def _purge_core(content_paths):
+        raise ValueError(f"Could not purge {content_paths}")
+
+    monkeypatch.setattr(cdn, "_purge_core", _purge_core)
+
+    with pytest.raises(ValueError):
+        cdn.purge(content_paths=["/a/app.html"]).result(timeout=5)
+    assert cdn.stats()["failures"] == 1
+
+
+def test_purge_nothing(cdn):
+    """Purging no paths is done immediately"""
+    assert cdn.purge(content_paths=[]).done()
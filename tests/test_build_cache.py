@@ -0,0 +1,44 @@
+"""We have a persistent, content addressed cache of build folders"""
+import os
+from pathlib import Path
+
+from panel_sharing.shared.build_cache import BuildCache
+
+
+def test_put_and_get(tmpdir):
+    """We can store a build folder and restore it to another folder"""
+    cache = BuildCache(path=Path(tmpdir) / "cache")
+    build = Path(tmpdir) / "build"
+    build.mkdir()
+    (build / "app.html").write_text("hello", encoding="utf8")
+
+    assert "key" not in cache
+    cache.put("key", build)
+    assert "key" in cache
+
+    restored = Path(tmpdir) / "restored"
+    assert cache.get("key", restored)
+    assert (restored / "app.html").read_text(encoding="utf8") == "hello"
+
+    del cache["key"]
+    assert not cache.get("key", restored)
+
+
+def test_evict_least_recently_used(tmpdir):
+    """The least recently used builds are evicted when there are more than max_entries"""
+    cache = BuildCache(path=Path(tmpdir) / "cache", max_entries=2)
+    build = Path(tmpdir) / "build"
+    build.mkdir()
+    (build / "app.html").write_text("hello", encoding="utf8")
+    for index, key in enumerate(["first", "second"]):
+        cache.put(key, build)
+        os.utime(Path(tmpdir) / "cache" / key, (index, index))
+    assert cache.get("first", Path(tmpdir) / "restored")
+
+    cache.put("third", build)
+
+    assert "second" not in cache
+    assert "first" in cache and "third" in cache
+
+    cache.clear()
+    assert "first" not in cache and "third" not in cache
@@ -0,0 +1,91 @@
+"""We can coordinate the builds of all sessions"""
+import threading
+
+import pytest
+
+from panel_sharing.build_scheduler import (
+    BULK,
+    INTERACTIVE,
+    SHARE,
+    BuildScheduler,
+    BuildSchedulerBusy,
+)
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def blocked_scheduler():
+    """Returns a BuildScheduler running a single build that waits for the event to be set"""
+    scheduler = BuildScheduler(max_concurrent=1, max_queued=3)
+    started = threading.Event()
+    event = threading.Event()
+
+    def block():
+        started.set()
+        event.wait()
+
+    scheduler.submit(key="blocking", function=block)
+    started.wait(timeout=5)
+    yield scheduler, event
+    event.set()
+
+
+def test_identical_builds_are_merged(blocked_scheduler):
+    """Identical builds in flight are run once"""
+    scheduler, event = blocked_scheduler
+    calls = []
+
+    def build():
+        calls.append(1)
+        return "result"
+
+    future1 = scheduler.submit(key="digest", function=build)
+    future2 = scheduler.submit(key="digest", function=build)
+    event.set()
+
+    assert future1 is future2
+    assert future1.result(timeout=5) == "result"
+    assert calls == [1]
+
+
+def test_interactive_builds_run_first(blocked_scheduler):
+    """Interactive builds run before shares and bulk rebuilds"""
+    scheduler, event = blocked_scheduler
+    order = []
+
+    bulk = scheduler.submit(key="bulk", function=lambda: order.append(BULK), priority=BULK)
+    share = scheduler.submit(key="share", function=lambda: order.append(SHARE), priority=SHARE)
+    interactive = scheduler.submit(
+        key="interactive", function=lambda: order.append(INTERACTIVE), priority=INTERACTIVE
+    )
+    event.set()
+
+    for future in [bulk, share, interactive]:
+        future.result(timeout=5)
+    assert order == [INTERACTIVE, SHARE, BULK]
+
+
+def test_busy(blocked_scheduler):
+    """New work is rejected when the queue is full"""
+    scheduler, _ = blocked_scheduler
+    scheduler.submit(key="1", function=lambda: None)
+    scheduler.submit(key="2", function=lambda: None)
+    scheduler.submit(key="3", function=lambda: None)
+
+    with pytest.raises(BuildSchedulerBusy):
+        scheduler.submit(key="4", function=lambda: None)
+
+
+def test_busy_without_queue():
+    """Without a queue only the builds that can start immediately are accepted"""
+    scheduler = BuildScheduler(max_concurrent=1, max_queued=0)
+    event = threading.Event()
+
+    future = scheduler.submit(key="1", function=event.wait)
+    with pytest.raises(BuildSchedulerBusy):
+        scheduler.submit(key="2", function=lambda: None)
+    event.set()
+    future.result(timeout=5)
+
+    scheduler.submit(key="3", function=lambda: None).result(timeout=5)
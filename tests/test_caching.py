@@ -0,0 +1,99 @@
+"""We can cache the projects of a slow storage on the local disk"""
+from pathlib import Path
+
+import pytest
+
+from panel_sharing.caching import CachingStorage
+from panel_sharing.models import Project, Source, Storage
+
+# pylint: disable=redefined-outer-name
+
+
+class MemoryStorage(Storage):
+    """A storage that keeps the projects in memory and counts the reads"""
+
+    def __init__(self, **params):
+        super().__init__(**params)
+        self.projects = {}
+        self.versions = {}
+        self.reads = 0
+
+    def __getitem__(self, key):
+        self.reads += 1
+        return Project(source=Source(code=self.projects[key]))
+
+    def __setitem__(self, key, value: Project):
+        self.projects[key] = value.source.code
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def __delitem__(self, key):
+        del self.projects[key]
+
+    def keys(self):
+        return sorted(self.projects)
+
+    def copy(self, key, project: Project):
+        self[key] = project
+
+    def get_etag(self, key):
+        """Returns the version of the project"""
+        return str(self.versions.get(key, 0))
+
+    def get_url(self, key, file):
+        """Returns the url of the file"""
+        return f"https://example.com/{key}/{file}"
+
+
+@pytest.fixture
+def storage(tmpdir):
+    """Returns a CachingStorage of a MemoryStorage with one project"""
+    memory_storage = MemoryStorage()
+    memory_storage["user/app"] = Project(source=Source(code="import panel"))
+    return CachingStorage(path=Path(tmpdir) / "cache", storage=memory_storage)
+
+
+def test_read_through(storage):
+    """The project is read from the wrapped storage once and then from the cache"""
+    assert storage["user/app"].source.code == "import panel"
+    assert storage["user/app"].source.code == "import panel"
+
+    assert storage.storage.reads == 1
+    assert storage.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_revalidate(storage):
+    """A project changed in the wrapped storage is read again"""
+    storage["user/app"]  # pylint: disable=pointless-statement
+    storage.storage["user/app"] = Project(source=Source(code="import holoviews"))
+
+    assert storage["user/app"].source.code == "import holoviews"
+    assert storage.storage.reads == 2
+
+
+def test_invalidate_on_set(storage):
+    """A project set via the cache is not read from the cache"""
+    storage["user/app"]  # pylint: disable=pointless-statement
+    storage["user/app"] = Project(source=Source(code="import hvplot"))
+
+    assert storage.stats()["entries"] == 0
+    assert storage["user/app"].source.code == "import hvplot"
+
+
+def test_evict_least_recently_used(storage):
+    """The least recently used projects are evicted"""
+    storage.max_entries = 2
+    for key in ["user/a", "user/b", "user/c"]:
+        storage.storage[key] = Project(source=Source(code=f"# {key}"))
+        storage[key]  # pylint: disable=pointless-statement
+
+    assert storage.stats()["entries"] == 2
+    storage["user/c"]  # pylint: disable=pointless-statement
+    assert storage.stats()["hits"] == 1
+    storage["user/a"]  # pylint: disable=pointless-statement
+    assert storage.stats()["misses"] == 4
+
+
+def test_forwards_attributes(storage):
+    """The attributes of the wrapped storage are available"""
+    assert storage.get_url("user/app", "app.html") == "https://example.com/user/app/app.html"
+    assert storage.keys() == ["user/app"]
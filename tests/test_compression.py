@@ -0,0 +1,51 @@
+"""We can minify and precompress the files of a build"""
+import gzip
+
+import pytest
+
+from panel_sharing.shared import compression
+
+HTML = "<html>  <head>  <title> Hello </title>  </head> <body>  <div>  Hello  </div> </body></html>"
+JS = "const   message = 'hello   world';  // comment\nconsole.log(message);"
+
+
+def _write(tmp_path):
+    (tmp_path / "app.html").write_text(HTML, encoding="utf8")
+    (tmp_path / "app.js").write_text(JS, encoding="utf8")
+
+
+def test_precompress(tmp_path):
+    """We get .gz siblings that decompress to the original content"""
+    _write(tmp_path)
+
+    compression.optimize_tree(tmp_path, minify_files=False)
+
+    for name, text in (("app.html", HTML), ("app.js", JS)):
+        data = (tmp_path / f"{name}.gz").read_bytes()
+        assert gzip.decompress(data).decode("utf8") == text
+        assert compression.is_precompressed(tmp_path / f"{name}.gz")
+    assert not compression.is_precompressed(tmp_path / "app.html")
+
+
+def test_precompress_brotli(tmp_path):
+    """We get .br siblings if brotli is installed"""
+    brotli = pytest.importorskip("brotli")
+    _write(tmp_path)
+
+    compression.precompress(tmp_path / "app.js")
+
+    assert brotli.decompress((tmp_path / "app.js.br").read_bytes()).decode("utf8") == JS
+
+
+def test_minify(tmp_path):
+    """The files are minified but keep the <head> tag and the strings"""
+    pytest.importorskip("minify_html")
+    pytest.importorskip("rjsmin")
+    _write(tmp_path)
+
+    compression.optimize_tree(tmp_path)
+
+    html = (tmp_path / "app.html").read_text(encoding="utf8")
+    js = (tmp_path / "app.js").read_text(encoding="utf8")
+    assert len(html) < len(HTML) and "<head>" in html
+    assert len(js) < len(JS) and "'hello   world'" in js
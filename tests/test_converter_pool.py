@@ -0,0 +1,112 @@
+"""We have a pool of long lived converter processes"""
+from pathlib import Path
+
+import pytest
+
+from panel_sharing.converter_pool import ConverterLimitExceeded, ConverterPool
+from panel_sharing.models import Source
+
+# pylint: disable=redefined-outer-name
+
+CODE = "import panel as pn;pn.panel('hello').servable()"
+
+
+@pytest.fixture
+def pool():
+    """Returns a ConverterPool"""
+    pool = ConverterPool(size=1, health_check_period=0)
+    yield pool
+    pool.close()
+
+
+def _save_source(path: Path, code=CODE):
+    source = Source(code=code)
+    for file, text in source._items():  # pylint: disable=protected-access
+        (path / "source").mkdir(parents=True, exist_ok=True)
+        (path / "source" / file).write_text(text, encoding="utf8")
+
+
+def test_convert(tmpdir, pool):
+    """We can convert projects and the worker is reused"""
+    for index in range(3):
+        path = Path(tmpdir) / str(index)
+        _save_source(path)
+
+        assert not pool.convert(path=path, kwargs={})
+        assert (path / "build" / "app.html").exists()
+        assert (path / "build" / "app.js").exists()
+
+    assert pool.health_check() == 1
+
+
+def test_convert_isolated(tmpdir, pool):
+    """A build cannot see the state set by an earlier build in the same worker"""
+    path = Path(tmpdir) / "first"
+    _save_source(path, code="import builtins\nbuiltins.LEAK = 1\n" + CODE)
+    assert not pool.convert(path=path, kwargs={})
+
+    path = Path(tmpdir) / "second"
+    _save_source(path, code="import builtins\nassert not hasattr(builtins, 'LEAK')\n" + CODE)
+
+    assert not pool.convert(path=path, kwargs={})
+
+
+def test_convert_error(tmpdir, pool):
+    """We get the error message if the conversion fails"""
+    path = Path(tmpdir)
+    _save_source(path, code="import panel as pn")
+
+    assert pool.convert(path=path, kwargs={})
+    assert "alert-convert-failed" in (path / "build" / "app.html").read_text(encoding="utf8")
+
+
+def test_convert_timeout(tmpdir):
+    """A build running longer than the timeout is killed and the pool keeps working"""
+    pool = ConverterPool(size=1, timeout=5, max_cpu=0, health_check_period=0)
+    try:
+        path = Path(tmpdir) / "loop"
+        _save_source(path, code="while True: pass")
+        with pytest.raises(ConverterLimitExceeded, match="time limit"):
+            pool.convert(path=path, kwargs={})
+
+        path = Path(tmpdir) / "ok"
+        _save_source(path)
+        assert not pool.convert(path=path, kwargs={})
+    finally:
+        pool.close()
+
+
+def test_convert_max_cpu(tmpdir):
+    """A build using more cpu time than the limit is killed"""
+    pool = ConverterPool(size=1, timeout=0, max_cpu=1, health_check_period=0)
+    try:
+        path = Path(tmpdir)
+        _save_source(path, code="while True: pass")
+        with pytest.raises(ConverterLimitExceeded, match="cpu time limit"):
+            pool.convert(path=path, kwargs={})
+    finally:
+        pool.close()
+
+
+def test_convert_max_output_size(tmpdir):
+    """A build larger than the output size limit raises an error"""
+    pool = ConverterPool(size=1, max_output_size=0.001, health_check_period=0)
+    try:
+        path = Path(tmpdir)
+        _save_source(path)
+        with pytest.raises(ConverterLimitExceeded, match="output size limit"):
+            pool.convert(path=path, kwargs={})
+    finally:
+        pool.close()
+
+
+def test_convert_max_address_space(tmpdir):
+    """A build allocating more memory than the limit raises an error"""
+    pool = ConverterPool(size=1, max_address_space=4096, health_check_period=0)
+    try:
+        path = Path(tmpdir)
+        _save_source(path, code="data = bytearray(8 * 1024**3)")
+        with pytest.raises(ConverterLimitExceeded, match="memory limit"):
+            pool.convert(path=path, kwargs={})
+    finally:
+        pool.close()
@@ -0,0 +1,114 @@
+"""We can serve the development builds from memory"""
+import gzip
+import tempfile
+from pathlib import Path
+
+from tornado.testing import AsyncHTTPTestCase
+from tornado.web import Application
+
+from panel_sharing.shared.dev_builds import DevBuilds, get_routes
+
+# pylint: disable=redefined-outer-name
+
+APP_HTML = b"<html><head></head><body>Hello</body></html>"
+
+
+def create_build(path: Path, size: int = 0) -> Path:
+    """Returns a build folder with an app.html, its .gz sibling and an app.js of size bytes"""
+    path.mkdir(parents=True)
+    (path / "app.html").write_bytes(APP_HTML)
+    (path / "app.html.gz").write_bytes(gzip.compress(APP_HTML))
+    (path / "app.js").write_bytes(b"x" * size)
+    return path
+
+
+def test_put_and_get(tmpdir):
+    """The builds are kept in memory"""
+    builds = DevBuilds(max_size=10**6)
+    builds.put("key", create_build(Path(tmpdir) / "build"))
+
+    assert builds.get("key")["app.html"] == APP_HTML
+    assert "key" in builds
+
+    builds.discard("key")
+
+    assert builds.get("key") is None
+    assert builds.stats() == {"hits": 1, "misses": 1, "builds": 0, "size": 0}
+
+
+def test_drop_least_recently_used(tmpdir):
+    """The least recently served builds are dropped from memory when the memory runs out"""
+    builds = DevBuilds(max_size=2500)
+    builds.put("first", create_build(Path(tmpdir) / "first", 1000))
+    builds.put("second", create_build(Path(tmpdir) / "second", 1000))
+    builds.get("first")
+    builds.put("third", create_build(Path(tmpdir) / "third", 1000))
+
+    assert "second" not in builds
+    assert "first" in builds and "third" in builds
+
+
+def test_build_larger_than_memory(tmpdir):
+    """A build larger than the memory is not kept in memory and replaces the previous build"""
+    builds = DevBuilds(max_size=100)
+    builds.put("key", create_build(Path(tmpdir) / "small"))
+    builds.put("key", create_build(Path(tmpdir) / "large", 1000))
+
+    assert "key" not in builds
+
+
+class TestDevBuildHandler(AsyncHTTPTestCase):
+    """We can serve the development builds over http"""
+
+    def get_app(self):
+        # pylint: disable=attribute-defined-outside-init,consider-using-with
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = Path(self.tmpdir.name)
+        self.builds = DevBuilds(max_size=10**6)
+        self.builds.put("memory", create_build(path / "memory"))
+        create_build(path / "www" / "disk")
+        return Application(get_routes(path / "www", builds=self.builds))
+
+    def tearDown(self):
+        super().tearDown()
+        self.tmpdir.cleanup()
+
+    def test_serve_from_memory_and_disk(self):
+        """The builds are served from memory and otherwise from disk"""
+        for key in ["memory", "disk"]:
+            response = self.fetch(f"/apps-dev/{key}/app.html", decompress_response=False)
+            assert response.code == 200
+            assert response.body == APP_HTML
+            assert response.headers["Content-Type"] == "text/html"
+
+        assert self.fetch("/apps-dev/missing/app.html").code == 404
+        assert self.fetch("/apps-dev/disk/..%2F..%2Fmemory%2Fapp.html").code == 404
+
+    def test_read_into_memory_when_served(self):
+        """A build on disk is read into memory the first time it is served"""
+        assert "disk" not in self.builds
+
+        self.fetch("/apps-dev/disk/app.html")
+
+        assert self.builds.get("disk")["app.js"] == b""
+        assert self.fetch("/apps-dev/%2E%2E/memory%2Fapp.html").code == 404
+        assert ".." not in self.builds
+
+    def test_serve_precompressed(self):
+        """The precompressed file is served if accepted"""
+        response = self.fetch(
+            "/apps-dev/memory/app.html",
+            headers={"Accept-Encoding": "gzip"},
+            decompress_response=False,
+        )
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.body) == APP_HTML
+
+    def test_etag(self):
+        """The browser gets a 304 if the build is not modified"""
+        etag = self.fetch("/apps-dev/memory/app.html").headers["Etag"]
+
+        response = self.fetch("/apps-dev/memory/app.html", headers={"If-None-Match": etag})
+
+        assert response.code == 304
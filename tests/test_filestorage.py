@@ -1,4 +1,7 @@
 """We can work with a FileStorage"""
+from pathlib import Path
+
+import pytest
 
 from panel_sharing.models import FileStorage, Project
 
@@ -17,3 +20,23 @@ def test_set_and_get_project(tmpdir):
     assert project.source.code == new_project.source.code
     assert project.source.requirements == new_project.source.requirements
     assert project.source.readme == new_project.source.readme
+
+
+def test_keys_and_delete(tmpdir):
+    """We can list and delete the projects"""
+    project = Project()
+    storage = FileStorage(tmpdir)
+    storage["user/first"] = project
+    storage.copy(key="other/second", project=project)
+
+    assert storage.keys() == ["other/second", "user/first"]
+    assert storage.keys(prefix="user/") == ["user/first"]
+    assert storage.keys(user="other") == ["other/second"]
+
+    del storage["user/first"]
+
+    assert storage.keys() == ["other/second"]
+    assert not (Path(tmpdir) / "projects/user/first").exists()
+    assert not (Path(tmpdir) / "www/user/first").exists()
+    with pytest.raises(KeyError):
+        del storage["user/first"]
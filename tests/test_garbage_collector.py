@@ -0,0 +1,102 @@
+"""We can delete the temporary apps no longer in use"""
+import time
+from pathlib import Path
+
+import pytest
+
+from panel_sharing.models import Project, Source
+from panel_sharing.shared.app_index import AppIndex
+from panel_sharing.shared.garbage_collector import GarbageCollector
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def collector(tmpdir):
+    """Returns a GarbageCollector of three apps updated one after the other"""
+    root = Path(tmpdir) / "projects"
+    index = AppIndex(root.parent / "index.db", root=root)
+    for key in ["first", "second", "third"]:
+        Project(source=Source(code="import panel")).save(root / key)
+        index.upsert(key, root / key)
+        time.sleep(0.01)
+
+    def delete(key):
+        if not index.delete(key):
+            raise KeyError(key)
+
+    return GarbageCollector(
+        index=index, delete=delete, ttl=60, max_size=10**9, grace=0, interval=60
+    )
+
+
+def keys(collector):
+    """Returns the keys of the apps"""
+    return [app["key"] for app in collector._index.values()]  # pylint: disable=protected-access
+
+
+def test_released(collector):
+    """Released apps are deleted after the grace period"""
+    collector.acquire("first")
+    collector.acquire("first")
+    collector.release("first")
+    collector.collect()
+    assert keys(collector) == ["first", "second", "third"]
+
+    collector.release("first")
+    collector.collect()
+
+    assert keys(collector) == ["second", "third"]
+    assert collector.stats()["released"] == 1
+
+
+def test_ttl(collector):
+    """Apps older than the ttl are deleted unless in use"""
+    collector.acquire("second")
+    collector.ttl = 0
+
+    collector.collect()
+
+    assert keys(collector) == ["second"]
+    assert collector.stats()["expired"] == 2
+
+
+def test_max_size(collector):
+    """The least recently updated apps not in use are evicted to stay below the max_size"""
+    size = collector._index.get("first")["size"]  # pylint: disable=protected-access
+    collector.acquire("first")
+    collector.max_size = size
+
+    collector.collect()
+
+    assert keys(collector) == ["first"]
+    assert collector.stats() == {
+        "size": size,
+        "apps": 1,
+        "released": 0,
+        "expired": 0,
+        "evicted": 2,
+    }
+
+
+def test_acquired_while_collecting(collector, monkeypatch):
+    """Apps acquired by a session after the collector selected them are not deleted"""
+    # pylint: disable=protected-access
+    collector.ttl = 0
+    values = collector._index.values
+
+    class Acquired(dict):
+        """An app acquired right after the collector reads when it was updated"""
+
+        def __getitem__(self, name):
+            value = super().__getitem__(name)
+            if name == "updated":
+                collector.acquire(self["key"])
+            return value
+
+    monkeypatch.setattr(collector._index, "values", lambda: [Acquired(app) for app in values()])
+
+    collector.collect()
+
+    assert keys(collector) == ["first", "second", "third"]
+    assert collector.stats()["expired"] == 0
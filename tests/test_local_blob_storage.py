@@ -0,0 +1,130 @@
+"""We can run the AzureBlobStorage against the local stand in for Azure Blob Storage"""
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError
+from tornado.testing import AsyncHTTPTestCase
+from tornado.web import Application
+
+from panel_sharing import models
+from panel_sharing.models import AzureBlobStorage, Project, Source
+from panel_sharing.shared.azure.local import LocalBlobServiceClient, get_routes
+
+# pylint: disable=redefined-outer-name
+
+KEY = "user/app"
+
+
+@pytest.fixture
+def storage(tmpdir, monkeypatch):
+    """Returns an AzureBlobStorage of a local blob service"""
+    monkeypatch.setattr(models.AZURE_CDN, "purge", lambda content_paths: None)
+    return AzureBlobStorage(conn_str=f"local://{tmpdir}")
+
+
+@pytest.fixture
+def project():
+    """Returns a project"""
+    return Project(source=Source(code="import panel as pn\npn.panel('Hello').servable()"))
+
+
+def test_set_get_and_delete(storage, project):
+    """We can share, load, list and delete projects"""
+    storage[KEY] = project
+
+    assert storage[KEY] == project
+    assert storage.keys() == [KEY]
+    assert storage.get_url(KEY, "build/app.html") == storage.web_url + KEY + "/app.html"
+    assert [blob.name for blob in storage.web_container_client.list_blobs(KEY + "/app.")] == [
+        KEY + "/app.html",
+        KEY + "/app.js",
+    ]
+
+    storage.delete(KEY)
+
+    assert not storage.keys()
+    assert not storage.rebuild_index()
+
+
+def test_get_etag(storage, project):
+    """The etag changes when the project changes"""
+    storage[KEY] = project
+    etag = storage.get_etag(KEY)
+    assert storage.get_etag(KEY) == etag
+
+    project.source.readme = "A new readme"
+    storage[KEY] = project
+
+    assert storage.get_etag(KEY) != etag
+
+
+def test_conditional_upload(tmpdir):
+    """Uploads respect overwrite and etag conditions like Azure"""
+    blob_client = LocalBlobServiceClient(Path(tmpdir)).get_blob_client("test", "blob")
+    blob_client.upload_blob(b"1")
+    etag = blob_client.get_blob_properties().etag
+
+    with pytest.raises(ResourceExistsError):
+        blob_client.upload_blob(b"2")
+    blob_client.upload_blob(
+        b"2", overwrite=True, etag=etag, match_condition=MatchConditions.IfNotModified
+    )
+    with pytest.raises(ResourceModifiedError):
+        blob_client.upload_blob(
+            b"3", overwrite=True, etag=etag, match_condition=MatchConditions.IfNotModified
+        )
+    assert blob_client.download_blob().readall() == b"2"
+
+
+def test_latency(tmpdir):
+    """Every request waits the latency"""
+    blob_client = LocalBlobServiceClient(Path(tmpdir), latency=0.05).get_blob_client("test", "blob")
+    start = time.perf_counter()
+    blob_client.upload_blob(b"1")
+    blob_client.download_blob()
+    assert time.perf_counter() - start >= 0.1
+
+
+def test_urls_of_local_routes(tmpdir):
+    """The urls of a local storage are served by the local routes. Not by Azure"""
+    storage = AzureBlobStorage(conn_str=f"local://{tmpdir}")
+
+    assert storage.get_url(KEY, "build/app.html") == f"local-blobs/$web/{KEY}/app.html"
+    assert storage.get_url(KEY, "source/app.py") == f"local-blobs/project/{KEY}/source/app.py"
+
+
+class TestLocalBlobHandler(AsyncHTTPTestCase):
+    """We can serve the shared apps of the local blob service over http"""
+
+    def get_app(self):
+        # pylint: disable=attribute-defined-outside-init,consider-using-with
+        self.tmpdir = tempfile.TemporaryDirectory()
+        conn_str = f"local://{self.tmpdir.name}"
+        self.storage = AzureBlobStorage(conn_str=conn_str)
+        self.storage[KEY] = Project(
+            source=Source(code="import panel as pn\npn.panel('Hello').servable()")
+        )
+        return Application(get_routes(conn_str))
+
+    def tearDown(self):
+        super().tearDown()
+        self.tmpdir.cleanup()
+
+    def test_serve_shared_app(self):
+        """The shared app is served at its url with the content settings of its blob"""
+        response = self.fetch("/" + self.storage.get_url(KEY, "build/app.html"))
+
+        assert response.code == 200
+        assert b"Hello" in response.body
+        assert response.headers["Content-Type"] == "text/html"
+        assert self.fetch("/" + self.storage.get_url("user/missing", "build/app.html")).code == 404
+
+    def test_etag(self):
+        """The browser gets a 304 if the blob is not modified"""
+        url = "/" + self.storage.get_url(KEY, "build/app.html")
+        etag = self.fetch(url).headers["Etag"]
+
+        assert self.fetch(url, headers={"If-None-Match": etag}).code == 304
@@ -1,11 +1,40 @@
 """We can work with a Project"""
+import gzip
+import json
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from pathlib import Path
 
-from panel_sharing import config
+import pytest
+
+from panel_sharing import building, config
+from panel_sharing.converter_pool import ConverterError, ConverterLimitExceeded
 from panel_sharing.models import Project, Source
+from panel_sharing.shared.build_cache import BuildCache
+from panel_sharing.shared.transfer import write_text
 from panel_sharing.utils import set_directory
 
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture(autouse=True)
+def conversions(monkeypatch, tmp_path_factory):
+    """Replaces the BUILD_CACHE by an empty cache and records the conversions
+
+    Returns:
+        The list of the kwargs of the conversions
+    """
+    monkeypatch.setattr(building, "BUILD_CACHE", BuildCache(tmp_path_factory.mktemp("cache")))
+    calls = []
+    convert = building.CONVERTER_POOL.convert
+
+    def record(*args, **kwargs):
+        calls.append(kwargs)
+        return convert(*args, **kwargs)
+
+    monkeypatch.setattr(building.CONVERTER_POOL, "convert", record)
+    return calls
+
 
 def test_build(tmpdir):
     """We can build a project"""
@@ -68,11 +97,251 @@ def test_to_zip_folder():
     assert project == new_project
 
 
-def test_tmpdir_deleted():
-    """The tmpdir is deleted when the Project is deleted"""
+def test_tmpdir_is_created_on_first_use(tmpdir):
+    """A Project only creates its tmpdir when saved and deletes it when closed"""
+    # pylint: disable=protected-access
+    project = Project.from_base64(Project(source=Source(code="import panel")).to_base64())
+    assert project._tmpdir is None
+    assert not project.read_build_json()
+    assert project._tmpdir is None
+
+    with project:
+        project.save(Path(tmpdir) / "project")
+        path = Path(project._tmpdir.name)
+        assert (path / "source" / "app.py").exists()
+
+    assert project._tmpdir is None
+    assert not path.exists()
+    project.save(Path(tmpdir) / "project")
+    assert (project._tmppath / "source" / "app.py").exists()
+
+    read_project = Project.read(Path(tmpdir) / "project")
+    assert read_project._tmpdir is None
+    read_project.save(Path(tmpdir) / "saved")
+    assert (read_project._tmppath / "source" / "app.py").exists()
+
+
+def test_build_digest_is_stable():
+    """The build digest only depends on the build inputs"""
+    project = Project(source=Source(code="import panel", readme="a"))
+    other = Project(source=Source(code="import panel", readme="b"))
+    kwargs = {"app": "source/app.py"}
+    # pylint: disable=protected-access
+    assert project._get_build_digest(kwargs) == other._get_build_digest(kwargs)
+    other.source.code = "import panel as pn"
+    assert project._get_build_digest(kwargs) != other._get_build_digest(kwargs)
+
+
+def test_build_is_restored_from_cache(tmpdir, conversions):
+    """A second project with the same source is not converted again"""
+    code = "import panel as pn;pn.panel('cached').servable()"
+    with set_directory(Path(tmpdir) / "first"):
+        Project(source=Source(code=code)).build()
+    conversions.clear()
+
+    with set_directory(Path(tmpdir) / "second"):
+        Project(source=Source(code=code)).build()
+        assert Path("build/app.html").exists()
+    assert not conversions
+
+
+def test_rebuild_converts_again(tmpdir, conversions):
+    """A rebuild converts the project again instead of restoring the cached build"""
+    project = Project(source=Source(code="import panel as pn;pn.panel('rebuild').servable()"))
+    project.build(Path(tmpdir) / "project")
+    conversions.clear()
+
+    project.rebuild(Path(tmpdir) / "project")
+
+    assert len(conversions) == 1
+    assert (Path(tmpdir) / "project" / "build" / "app.html").exists()
+
+
+def test_read_stale_build_is_built_again(tmpdir):
+    """A project read with a build of an older build digest is built again"""
+    path = Path(tmpdir) / "project"
+    Project(source=Source(code="import panel as pn;pn.panel('stale').servable()")).build(path)
+    # The files are linked to the cache. Replace them instead of writing to them
+    write_text(path / "build" / "app.html", "<html><head></head>stale build</html>")
+    build_json = json.loads((path / "build" / "config.json").read_text(encoding="utf8"))
+    build_json["build_digest"] = "old"
+    write_text(path / "build" / "config.json", json.dumps(build_json))
+
+    project = Project.read(path)
+    assert not project.is_build_current()
+    project.build(Path(tmpdir) / "rebuilt")
+
+    app_html = (Path(tmpdir) / "rebuilt" / "build" / "app.html").read_text(encoding="utf8")
+    assert "stale build" not in app_html
+    assert project.is_build_current()
+
+
+def test_save_read_path(tmpdir):
+    """We can save and read a project to and from a path without changing the cwd"""
+    cwd = Path.cwd()
     project = Project()
-    tmpdir = project._tmpdir.name  # pylint: disable=protected-access
-    assert tmpdir
-    assert Path(tmpdir).exists()
-    del project
-    assert not Path(tmpdir).exists()
+    project.source.code = "import panel"
+    project.save(Path(tmpdir))
+
+    assert Path.cwd() == cwd
+    assert (Path(tmpdir) / "source/app.py").exists()
+    assert Project.read(Path(tmpdir)).source.code == project.source.code
+
+
+def test_edit_while_building(tmpdir, monkeypatch):
+    """The build is marked with the digest of the saved source, not of a later edit"""
+    project = Project(source=Source(code="import panel as pn;pn.panel('before').servable()"))
+    convert = building.CONVERTER_POOL.convert
+
+    def edit(*args, **kwargs):
+        project.source.code = "import panel as pn;pn.panel('after').servable()"
+        return convert(*args, **kwargs)
+
+    monkeypatch.setattr(building.CONVERTER_POOL, "convert", edit)
+    project.build(Path(tmpdir) / "first")
+    monkeypatch.setattr(building.CONVERTER_POOL, "convert", convert)
+
+    assert not project.is_build_current()
+    project.build(Path(tmpdir) / "second")
+    assert project.is_build_current()
+    assert "after" in (Path(tmpdir) / "second" / "build" / "app.js").read_text(encoding="utf8")
+
+
+def test_build_concurrently(tmpdir):
+    """We can build projects in threads"""
+    projects = {
+        Path(tmpdir)
+        / str(index): Project(
+            source=Source(code=f"import panel as pn;pn.panel('{index}').servable()")
+        )
+        for index in range(3)
+    }
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(lambda item: item[1].build(item[0]), projects.items()))
+
+    for path, project in projects.items():
+        assert Project.read(path) == project
+        assert (path / "build" / "app.html").exists()
+
+
+def test_build_exceeding_limits(tmpdir, monkeypatch):
+    """A build exceeding the converter limits shows an error and is not cached"""
+
+    def exceed(*args, **kwargs):
+        raise ConverterLimitExceeded("The build exceeded the time limit of 1 seconds")
+
+    monkeypatch.setattr(building.CONVERTER_POOL, "convert", exceed)
+    project = Project(source=Source(code="while True: pass"))
+    project.build(Path(tmpdir) / "project")
+
+    app_html = (Path(tmpdir) / "project" / "build" / "app.html").read_text(encoding="utf8")
+    assert "Build exceeded limits" in app_html
+    assert not list(building.BUILD_CACHE._path.iterdir())  # pylint: disable=protected-access
+
+
+def test_build_of_stopped_converter(tmpdir, monkeypatch):
+    """A build whose converter stops unexpectedly shows an error and is not cached"""
+
+    def stop(*args, **kwargs):
+        raise ConverterError("The converter stopped unexpectedly with exit code -11")
+
+    monkeypatch.setattr(building.CONVERTER_POOL, "convert", stop)
+    project = Project(source=Source(code="import panel as pn;pn.panel('crash').servable()"))
+    project.build(Path(tmpdir) / "project")
+
+    app_html = (Path(tmpdir) / "project" / "build" / "app.html").read_text(encoding="utf8")
+    assert "Build failed. The converter stopped unexpectedly" in app_html
+    assert not list(building.BUILD_CACHE._path.iterdir())  # pylint: disable=protected-access
+
+
+def test_readme_change_does_not_convert(tmpdir, conversions):
+    """Changing the readme updates the files without converting the project again"""
+    project = Project(source=Source(code="import panel as pn;pn.panel('readme').servable()"))
+    project.build(Path(tmpdir))
+    conversions.clear()
+
+    project.source.readme = "# New readme"
+    project.build(Path(tmpdir))
+
+    assert (Path(tmpdir) / "source/readme.md").read_text(encoding="utf8") == "# New readme"
+    assert (Path(tmpdir) / "build/app.html").exists()
+    assert (Path(tmpdir) / "build/config.json").exists()
+    assert not conversions
+
+
+def test_code_change_removes_stale_build(tmpdir):
+    """Changing the code removes the build of the old code"""
+    project = Project(source=Source(code="import panel as pn;pn.panel('stale').servable()"))
+    project.build(Path(tmpdir) / "first")
+
+    project.source.code = "import panel as pn;pn.panel('fresh').servable()"
+    project.save(Path(tmpdir) / "second")
+
+    assert not (Path(tmpdir) / "second" / "build").exists()
+
+
+def test_base_target_change_does_not_convert(tmpdir, conversions):
+    """Changing the base target rewrites the app.html without converting the project again"""
+    project = Project(source=Source(code="import panel as pn;pn.panel('target').servable()"))
+    development = Path(tmpdir) / "development"
+    project.build(development, base_target="_blank")
+    conversions.clear()
+
+    shared = Path(tmpdir) / "shared"
+    project.build(shared, base_target="")
+
+    assert "<base target='_blank' />" in (development / "build/app.html").read_text(encoding="utf8")
+    assert "<base target=" not in (shared / "build/app.html").read_text(encoding="utf8")
+    # The project read knows the base target of its build. Thus it removes it
+    Project.read(development).build(Path(tmpdir) / "read", base_target="")
+    assert "<base target=" not in (Path(tmpdir) / "read/build/app.html").read_text(encoding="utf8")
+    assert not conversions
+
+
+def test_build_is_precompressed(tmpdir):
+    """The build files get precompressed siblings that match the base target"""
+    project = Project(source=Source(code="import panel as pn;pn.panel('gzip').servable()"))
+    project.build(Path(tmpdir), base_target="_blank")
+
+    app_html = Path(tmpdir) / "build" / "app.html"
+    compressed = gzip.decompress((Path(tmpdir) / "build" / "app.html.gz").read_bytes())
+    assert compressed.decode("utf8") == app_html.read_text(encoding="utf8")
+    assert (Path(tmpdir) / "build" / "app.js.gz").exists()
+
+
+def test_build_is_minified_without_precompression(tmpdir, monkeypatch):
+    """The build files are minified even if they are not precompressed"""
+    pytest.importorskip("minify_html")
+    monkeypatch.setattr(config, "BUILD_PRECOMPRESS", False)
+    code = "import panel as pn;pn.panel('minify').servable()"
+    monkeypatch.setattr(config, "BUILD_MINIFY", False)
+    Project(source=Source(code=code)).build(Path(tmpdir) / "plain")
+    monkeypatch.setattr(config, "BUILD_MINIFY", True)
+    Project(source=Source(code=code)).build(Path(tmpdir) / "minified")
+
+    plain = (Path(tmpdir) / "plain" / "build" / "app.html").read_text(encoding="utf8")
+    minified = (Path(tmpdir) / "minified" / "build" / "app.html").read_text(encoding="utf8")
+    assert len(minified) < len(plain)
+    assert not list((Path(tmpdir) / "minified" / "build").glob("*.gz"))
+
+
+def test_from_files(tmpdir, conversions):
+    """We can create a built Project from the contents of its files"""
+    project = Project(source=Source(code="import panel as pn;pn.panel('files').servable()"))
+    project.build(Path(tmpdir))
+    files = {
+        file.relative_to(tmpdir).as_posix(): file.read_bytes()
+        for file in Path(tmpdir).rglob("*")
+        if file.is_file()
+    }
+    conversions.clear()
+
+    new_project = Project.from_files(files)
+
+    assert new_project == project
+    assert new_project.is_build_current()
+    # The files are only written when the project is built
+    assert new_project._tmpdir is None  # pylint: disable=protected-access
+    new_project.build(Path(tmpdir) / "new")
+    assert (Path(tmpdir) / "new" / "build" / "app.js").read_bytes() == files["build/app.js"]
+    assert not conversions
@@ -0,0 +1,106 @@
+"""We can rebuild the apps of a storage in bulk"""
+import json
+from pathlib import Path
+
+import pytest
+
+from panel_sharing import building
+from panel_sharing.models import FolderStorage, Project, Source
+from panel_sharing.shared.build_cache import BuildCache
+from panel_sharing.rebuild import FAILED, REBUILT, SKIPPED, rebuild, run
+
+# pylint: disable=redefined-outer-name
+
+CODE = "import panel as pn;pn.panel('{}').servable()"
+
+
+@pytest.fixture
+def storage(tmpdir):
+    """Returns a FolderStorage with two projects saved but not built"""
+    path = Path(tmpdir) / "apps"
+    for key in ["first", "second"]:
+        Project(source=Source(code=CODE.format(key))).save(path / key)
+    return FolderStorage(path=path)
+
+
+def test_rebuild(storage):
+    """Stale apps are rebuilt and up to date apps are skipped"""
+    assert storage.keys() == ["first", "second"]
+
+    report = rebuild(storage)
+
+    assert report[REBUILT] == 2
+    assert report["timings"].keys() == {"first", "second"}
+    assert storage["first"].is_build_current()
+
+    report = rebuild(storage)
+
+    assert report[SKIPPED] == 2
+
+
+def test_rebuild_restores_identical_apps_from_cache(storage, tmpdir, monkeypatch):
+    """A stale app identical to an app already built is not converted again unless forced"""
+    Project(source=Source(code=CODE.format("first"))).save(Path(tmpdir) / "apps" / "copy")
+    monkeypatch.setattr(building, "BUILD_CACHE", BuildCache(Path(tmpdir) / "cache"))
+    conversions = []
+    convert = building.CONVERTER_POOL.convert
+
+    def record(*args, **kwargs):
+        conversions.append(kwargs)
+        return convert(*args, **kwargs)
+
+    monkeypatch.setattr(building.CONVERTER_POOL, "convert", record)
+
+    report = rebuild(storage, keys=["first", "copy"], max_workers=1)
+
+    assert report[REBUILT] == 2
+    assert len(conversions) == 1
+
+    report = rebuild(storage, keys=["first", "copy"], max_workers=1, force=True)
+
+    assert report[REBUILT] == 2
+    assert len(conversions) == 3
+
+
+def test_rebuild_resumes_from_checkpoint(storage, tmpdir):
+    """Apps recorded in the checkpoint are not rebuilt again"""
+    checkpoint = Path(tmpdir) / "checkpoint.jsonl"
+    checkpoint.write_text(
+        json.dumps({"key": "first", "status": REBUILT, "error": "", "duration": 1.0}) + "\n",
+        encoding="utf8",
+    )
+    report_path = Path(tmpdir) / "report.json"
+
+    report = rebuild(storage, checkpoint=checkpoint, report=report_path)
+
+    assert report[REBUILT] == 2
+    assert not storage["first"].is_build_current()
+    assert storage["second"].is_build_current()
+    assert len(checkpoint.read_text(encoding="utf8").splitlines()) == 2
+    assert json.loads(report_path.read_text(encoding="utf8")) == report
+
+
+def test_rebuild_failure_keeps_existing_build(storage):
+    """A failed conversion is reported and does not replace the existing build"""
+    rebuild(storage)
+    project = storage["first"]
+    project.source.code = "import panel as pn"
+    project.save(storage._path / "first")  # pylint: disable=protected-access
+
+    report = rebuild(storage)
+
+    assert report[FAILED] == 1
+    assert report["failures"] == {"first": "The conversion failed"}
+    app_html = storage._path / "first/build/app.html"  # pylint: disable=protected-access
+    assert "alert-convert-failed" not in app_html.read_text(encoding="utf8")
+
+
+def test_run(storage, tmpdir, capsys):
+    """We can rebuild from the command line options"""
+    report_path = Path(tmpdir) / "report.json"
+
+    report = run(lambda: storage, description="", args=["first", "--report", str(report_path)])
+
+    assert report[REBUILT] == 1
+    assert json.dumps(report, indent=1) in capsys.readouterr().out
+    assert json.loads(report_path.read_text(encoding="utf8")) == report
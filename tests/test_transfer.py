@@ -0,0 +1,49 @@
+"""Test of the transfer functionality"""
+from panel_sharing.shared.transfer import link_tree, replace_tree, write_text
+
+
+def _create_tree(path):
+    (path / "sub").mkdir(parents=True)
+    (path / "app.py").write_text("print('hello')", encoding="utf8")
+    (path / "sub" / "data.csv").write_text("x,y\n1,2", encoding="utf8")
+
+
+def test_link_tree(tmp_path):
+    """We can link a tree"""
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    _create_tree(src)
+    # When
+    link_tree(src, dst)
+    # Then
+    assert (dst / "app.py").read_text(encoding="utf8") == "print('hello')"
+    assert (dst / "sub" / "data.csv").read_text(encoding="utf8") == "x,y\n1,2"
+
+
+def test_write_text_does_not_modify_linked_files(tmp_path):
+    """Replacing a linked file does not change the other links"""
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    _create_tree(src)
+    link_tree(src, dst)
+    # When
+    write_text(dst / "app.py", "print('world')")
+    # Then
+    assert (dst / "app.py").read_text(encoding="utf8") == "print('world')"
+    assert (src / "app.py").read_text(encoding="utf8") == "print('hello')"
+
+
+def test_replace_tree(tmp_path):
+    """We can replace a tree"""
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    _create_tree(src)
+    dst.mkdir()
+    (dst / "old.py").write_text("", encoding="utf8")
+    # When
+    replace_tree(src, dst)
+    # Then
+    assert not src.exists()
+    assert not (dst / "old.py").exists()
+    assert (dst / "app.py").exists()
+    assert [path.name for path in tmp_path.iterdir()] == ["dst"]